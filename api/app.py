@@ -5,10 +5,10 @@ from api import (
     agent_router,
     tag_router
 )
+from core.HttpTransport import http_sessions, LIVEAGENT_POOL
 from contextlib import asynccontextmanager
 from config.constants import APP_VERSION
 from fastapi import FastAPI
-import aiohttp
 import logging
 
 from api.logs.routes import router as monitoring_router
@@ -27,11 +27,11 @@ async def lifespan(app: FastAPI):
     runtime_tracker.initialize()
     logging.info("Creating aiohttp session...")
     logging.info("Starting app...")
-    app.state.aiohttp_session = aiohttp.ClientSession()
+    app.state.aiohttp_session = http_sessions.get(LIVEAGENT_POOL)
     yield
     logging.info("Closing aiohttp session...")
     logging.info("Closing app...")
-    await app.state.aiohttp_session.close()
+    await http_sessions.close()
 
 app = FastAPI(
     lifespan=lifespan,
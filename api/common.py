@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, Request, Query, HTTPException
+from fastapi import APIRouter, status, Request, Response, Query, HTTPException
 from config.config import LIVEAGENT_API_KEY
 from fastapi.responses import JSONResponse
 from core.extract.Extractor import Extractor
@@ -10,6 +10,7 @@ __all__ = [
     "Extractor",
     "APIRouter",
     "Request",
+    "Response",
     "status",
     "Query"
 ]
\ No newline at end of file
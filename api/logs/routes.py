@@ -9,6 +9,11 @@ from api.common import (
 )
 
 from core.extract.ExtractionLogger import ExtractionLogger
+from core.AsyncBigQuery import AsyncBigQuery
+from core.ConcurrencyController import liveagent_concurrency
+from core.CircuitBreaker import liveagent_breakers
+from core.RateLimiter import liveagent_rate_limiter
+from core.UserDirectory import user_directory
 
 router = APIRouter()
 
@@ -29,7 +34,10 @@ async def process_logs():
     import pandas as pd
     extraction_date = pd.Timestamp.now(tz=MNL_TZ)
     extraction_logger = ExtractionLogger()
-    response = extraction_logger.extract_and_load_to_bq(extraction_date)
+    # Several blocking queries and a load; keep them off the event loop
+    response = await AsyncBigQuery(extraction_logger.bigquery).run(
+        extraction_logger.extract_and_load_to_bq, extraction_date
+    )
     return response
 
 @router.get("/logs")
@@ -75,7 +83,19 @@ async def get_runtime_summary():
         "status": "completed" if runtime_data.app_end_time else "running",
         "routes_stats": {
             r.route: r.status.value for r in runtime_data.routes_execution
-        }
+        },
+        "circuit_breakers": liveagent_breakers.stats(),
+        "user_directory": user_directory.stats()
+    }
+
+@router.get("/concurrency")
+async def get_concurrency():
+    """Current adaptive concurrency limit for LiveAgent calls, with per-lane queueing and the rate limiter's state."""
+    return {
+        "concurrency": liveagent_concurrency.stats(),
+        "scheduler_lanes": liveagent_concurrency.scheduler_stats(),
+        "rate_limiter": liveagent_rate_limiter.stats(),
+        "timestamp": datetime.now(MNL_TZ).isoformat()
     }
 
 @router.get("/health")
@@ -7,6 +7,10 @@ def resolve_extraction_date(
     is_initial: bool,
     date_str: Optional[str]
 ) -> Tuple[pd.Timestamp, FilterField]:
+    """
+    Initial loads cover the month of `date_str` by `date_created`. Scheduled runs sync by `date_changed`
+    from the stored watermark; the returned date (6 hours ago) is only the starting point when no watermark exists yet.
+    """
     if is_initial:
         date = pd.Timestamp(date_str) if date_str else pd.Timestamp("2025-01-01")
         return date, FilterField.DATE_CREATED
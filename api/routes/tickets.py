@@ -3,9 +3,12 @@ from utils.session_utils import get_aiohttp_session
 from core.factory import create_extractor
 from config.constants import MAX_VALUE
 from typing import Optional
+from api.schemas.response import ResponseStatus
 from api.common import (
     APIRouter,
     Request,
+    Response,
+    status,
     Query
 )
 
@@ -15,8 +18,10 @@ router = APIRouter()
 @router.post("/process-tickets-and-messages")
 async def process_tickets_and_messages(
     request: Request,
+    http_response: Response,
     is_initial: bool = Query(False),
-    date: Optional[str] = Query(default=None, description="Start-of-month date (YYYY-MM-DD)")
+    date: Optional[str] = Query(default=None, description="Start-of-month date (YYYY-MM-DD)"),
+    pipelined: bool = Query(False, description="Fetch messages as ticket pages arrive instead of after the tickets load")
 ):
     session = get_aiohttp_session(request)
     date, filter_field = resolve_extraction_date(is_initial, date)
@@ -26,16 +31,25 @@ async def process_tickets_and_messages(
         session=session
     )
 
-    response = await extractor.extract_tickets_and_messages(
+    extract = (
+        extractor.extract_tickets_and_messages_pipelined
+        if pipelined
+        else extractor.extract_tickets_and_messages
+    )
+    response = await extract(
         date=date,
         filter_field=filter_field,
-        session=session,
-        concurrent_limit=15
+        session=session
     )
 
+    # Cloud Scheduler retries on non-2xx, so a run degraded by an open circuit is not reported as done
+    if response.status == ResponseStatus.CIRCUIT_OPEN:
+        http_response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
     res_data = {
         "status": response.status,
         "count": response.count,
-        "data": response.data
+        "data": response.data,
+        "message": response.message
     }
     return res_data
\ No newline at end of file
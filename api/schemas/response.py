@@ -6,6 +6,7 @@ class ResponseStatus(Enum):
     SUCCESS = "success"
     ERROR = "error"
     TIMEOUT = "timeout"
+    CIRCUIT_OPEN = "circuit_open"
 
 @dataclass
 class LiveAgentAPIResponse:
@@ -14,6 +15,7 @@ class LiveAgentAPIResponse:
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     status_code: Optional[int] = None
+    headers: Optional[Dict[str, str]] = None
 
 @dataclass
 class ExtractionResponse:
@@ -0,0 +1,104 @@
+"""
+Offline benchmark of ticket pagination, message fetching and user fetching.
+
+Record the scenario once against LiveAgent, then replay it as often as needed:
+
+    python -m benchmarks.bench_cassette_replay --mode record --date "2025-07-01"
+    python -m benchmarks.bench_cassette_replay --mode replay --date "2025-07-01" --latency-ms 150 --error-rate 0.02
+
+Replays are deterministic for a given `--seed`, so runs with different `--prefetch`,
+`--concurrency` or `--rate-per-minute` settings can be compared directly.
+"""
+from config.constants import RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, PAGE_PREFETCH_WINDOW
+from config.config import LIVEAGENT_API_KEY, LIVEAGENT_CASSETTE_DIR
+from core.schemas.TicketFilter import FilterField
+from core.LiveAgentClient import LiveAgentClient
+from core.ConcurrencyController import AIMDController
+from core.RateLimiter import TokenBucket
+from utils.tickets_util import set_filter
+from core.Cassette import Cassette
+from core.Ticket import Ticket
+import pandas as pd
+import argparse
+import asyncio
+import aiohttp
+import time
+
+async def run(args: argparse.Namespace):
+    cassette = Cassette(
+        mode=args.mode,
+        directory=args.cassette,
+        latency_ms=args.latency_ms if args.mode == "replay" else 0,
+        error_rate=args.error_rate if args.mode == "replay" else 0,
+        seed=args.seed
+    )
+    # A fresh limiter per run, so one scenario's pauses do not leak into the next benchmark
+    rate_limiter = TokenBucket(args.rate_per_minute, RATE_LIMIT_BURST)
+    concurrency = AIMDController()
+
+    async with aiohttp.ClientSession() as session:
+        client = LiveAgentClient(
+            LIVEAGENT_API_KEY or "replay",
+            session,
+            max_concurrent_requests=args.concurrency,
+            rate_limiter=rate_limiter,
+            cassette=cassette,
+            concurrency=concurrency
+        )
+        ticket = Ticket(client)
+        timings = {}
+
+        payload = ticket._default_payload()
+        payload["_filters"] = set_filter(pd.Timestamp(args.date), FilterField.DATE_CREATED)
+        started_at = time.perf_counter()
+        tickets_df = await ticket.fetch_tickets(
+            session, payload, args.max_pages, args.per_page, prefetch=args.prefetch
+        )
+        timings["paginate (tickets)"] = (time.perf_counter() - started_at, len(tickets_df))
+
+        if tickets_df.empty:
+            print("No tickets in the window; nothing else to benchmark.")
+            return
+
+        started_at = time.perf_counter()
+        messages = await ticket.fetch_ticket_messages_batch(
+            tickets_df["id"].tolist(),
+            tickets_df["agentid"].tolist(),
+            tickets_df["owner_name"].tolist(),
+            args.max_pages,
+            args.per_page,
+            session
+        )
+        timings["fetch_ticket_messages_batch"] = (time.perf_counter() - started_at, len(messages))
+
+        user_ids = list(ticket.message_processor._extract_unique_userids(messages))
+        started_at = time.perf_counter()
+        users = await ticket.message_processor.fetch_users_batch(session, user_ids)
+        timings["fetch_users_batch"] = (time.perf_counter() - started_at, len(users))
+
+    print(f"\n{'scenario':<30}{'seconds':>10}{'rows':>10}")
+    for name, (seconds, rows) in timings.items():
+        print(f"{name:<30}{seconds:>10.3f}{rows:>10}")
+    print(f"\ncassette: {cassette.stats()}")
+    print(f"rate limiter: {rate_limiter.stats()}")
+    print(f"scheduler: {client.scheduler.stats()}")
+    print(f"concurrency: {concurrency.stats()}")
+    print(f"coalesced requests: {client.coalesced_requests}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--cassette", default=LIVEAGENT_CASSETTE_DIR)
+    parser.add_argument("--date", required=True, help="Month of tickets to fetch (by date_created).")
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--prefetch", type=int, default=PAGE_PREFETCH_WINDOW)
+    parser.add_argument("--concurrency", type=int, default=None, help="Fixed in-flight limit (adaptive when omitted).")
+    parser.add_argument("--rate-per-minute", type=float, default=RATE_LIMIT_PER_MINUTE)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Replay only: delay added to every response.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Replay only: fraction of requests answered with 429.")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark: stdlib `json` vs `orjson` on LiveAgent-shaped payloads.
+
+Both decoders get the raw body bytes, as `LiveAgentClient._handle_response` does.
+
+    python -m benchmarks.bench_json_decode [--repeat 50]
+"""
+from utils.json_utils import get_json_loads, fast_loads
+from typing import Any, Dict, List
+import argparse
+import random
+import json
+import time
+
+HTML_PARAGRAPH = (
+    "<p>Hi po, good morning! I would like to ask about the <b>PMS package</b> for my car. "
+    "Is the price inclusive of labor and parts? &nbsp;Thank you.</p>"
+    "<div style=\"font-family: Arial, sans-serif; color: #222222;\"><br>Sent from my iPhone</div>"
+)
+
+def ticket_page(per_page: int = 100) -> List[Dict[str, Any]]:
+    """One page of `/tickets`."""
+    return [
+        {
+            "id": f"{random.getrandbits(32):08x}",
+            "owner_contactid": f"{random.getrandbits(32):08x}",
+            "owner_email": f"customer{i}@example.com",
+            "owner_name": f"Customer {i}",
+            "departmentid": "default",
+            "agentid": f"{random.getrandbits(32):08x}",
+            "status": random.choice(["A", "C", "R", "N", "T"]),
+            "tags": ["pms", "quotation"],
+            "code": f"ABC-{i:05d}",
+            "channel_type": random.choice(["E", "M", "F"]),
+            "date_created": "2025-07-01 08:15:30",
+            "date_changed": "2025-07-01 09:02:11",
+            "date_resolved": None,
+            "date_due": None,
+            "date_deleted": None,
+            "last_activity": "2025-07-01 09:02:11",
+            "last_activity_public": "2025-07-01 09:02:11",
+            "public_access_urlcode": f"{random.getrandbits(64):016x}",
+            "subject": "Inquiry about PMS package",
+            "custom_fields": [{"code": "plate_no", "value": "ABC 1234"}]
+        }
+        for i in range(per_page)
+    ]
+
+def message_page(per_page: int = 100, html_size: int = 20) -> List[Dict[str, Any]]:
+    """One page of `/tickets/{id}/messages`: message groups with HTML bodies."""
+    return [
+        {
+            "id": f"{random.getrandbits(32):08x}",
+            "parent_id": "",
+            "userid": f"{random.getrandbits(32):08x}",
+            "user_full_name": "Customer",
+            "type": random.choice(["M", "E", "F"]),
+            "status": "R",
+            "datecreated": "2025-07-01 08:15:30",
+            "datefinished": "2025-07-01 08:15:31",
+            "sort_order": i,
+            "mail_msg_id": "",
+            "pop3_msg_id": "",
+            "messages": [
+                {
+                    "id": f"{random.getrandbits(32):08x}",
+                    "userid": f"{random.getrandbits(32):08x}",
+                    "type": "M",
+                    "datecreated": "2025-07-01 08:15:30",
+                    "format": "H",
+                    "message": HTML_PARAGRAPH * html_size,
+                    "visibility": "P"
+                }
+                for _ in range(2)
+            ]
+        }
+        for i in range(per_page)
+    ]
+
+def bench(loads, body: bytes, repeat: int) -> float:
+    """Best-of-`repeat` seconds per decode."""
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        loads(body)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    payloads = {
+        "tickets": json.dumps(ticket_page()).encode(),
+        "messages": json.dumps(message_page()).encode()
+    }
+    engines = ["json"] + (["orjson"] if fast_loads is not None else [])
+    if len(engines) == 1:
+        print("orjson is not installed; only the stdlib decoder is measured.")
+
+    print(f"{'payload':<10}{'size':>10}" + "".join(f"{engine + ' (ms)':>14}" for engine in engines) + f"{'speedup':>10}")
+    for name, body in payloads.items():
+        timings = [bench(get_json_loads(engine), body, args.repeat) for engine in engines]
+        speedup = f"{timings[0] / timings[-1]:.1f}x" if len(timings) > 1 else "-"
+        print(
+            f"{name:<10}{len(body) // 1024:>8}KB"
+            + "".join(f"{timing * 1000:>14.3f}" for timing in timings)
+            + f"{speedup:>10}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: row-dict flattening of ticket messages vs `MessageColumns`.
+
+Both paths go from raw message groups to a DataFrame with sender/receiver columns; the row-dict
+path is the previous implementation (`{**base_info, ...}` per message, then `{**msg, ...}` again).
+
+    python -m benchmarks.bench_message_flatten [--tickets 2000] [--groups 10]
+"""
+from benchmarks.bench_json_decode import message_page
+from core.MessageColumns import MessageColumns
+from typing import Any, Callable, Dict, List, Tuple
+import pandas as pd
+import tracemalloc
+import argparse
+import random
+import time
+import gc
+
+def sender_receiver(message_userid: str, ticket_agentid: str, owner_name: str) -> Dict[str, str]:
+    if message_userid == ticket_agentid:
+        return {"sender_name": "Agent", "sender_type": "agent", "receiver_name": owner_name, "receiver_type": "client"}
+    return {"sender_name": owner_name, "sender_type": "client", "receiver_name": "Agent", "receiver_type": "agent"}
+
+def flatten_rows(tickets: List[Tuple[str, str, str, List[Dict[str, Any]]]]) -> pd.DataFrame:
+    flattened_messages = []
+    for ticket_id, owner_name, agentid, groups in tickets:
+        for message in groups:
+            base_info = {
+                "ticket_id": ticket_id,
+                "owner_name": owner_name,
+                "agentid": agentid,
+                "agent_name": "",
+                "id": message.get("id"),
+                "parent_id": message.get("parent_id"),
+                "userid": message.get("userid"),
+                "user_full_name": message.get("user_full_name"),
+                "type": message.get("type"),
+                "status": message.get("status"),
+                "datecreated": message.get("datecreated"),
+                "datefinished": message.get("datefinished"),
+                "sort_order": message.get("sort_order"),
+                "mail_msg_id": message.get("mail_msg_id"),
+                "pop3_msg_id": message.get("pop3_msg_id"),
+            }
+            messages = message.get("messages", [])
+            if messages:
+                for msg in messages:
+                    flattened_messages.append({
+                        **base_info,
+                        "message_id": msg.get("id"),
+                        "message_userid": msg.get("userid"),
+                        "message_type": msg.get("type"),
+                        "message_datecreated": msg.get("datecreated"),
+                        "message_format": msg.get("format"),
+                        "message": msg.get("message"),
+                        "message_visibility": msg.get("visibility")
+                    })
+            else:
+                flattened_messages.append(base_info)
+
+    processed_messages = []
+    for msg in flattened_messages:
+        info = sender_receiver(msg.get("userid"), msg.get("agentid"), msg.get("owner_name"))
+        processed_messages.append({**msg, **info, "agent_name": "Agent"})
+    return pd.DataFrame(processed_messages)
+
+def flatten_columns(tickets: List[Tuple[str, str, str, List[Dict[str, Any]]]]) -> pd.DataFrame:
+    flattened_messages = MessageColumns()
+    for ticket_id, owner_name, agentid, groups in tickets:
+        flattened_messages.append_ticket(ticket_id, owner_name, agentid, groups)
+    df = flattened_messages.to_frame()
+
+    columns = {"sender_name": [], "sender_type": [], "receiver_name": [], "receiver_type": []}
+    for message_userid, ticket_agentid, owner_name in zip(
+        df["userid"].tolist(), df["agentid"].tolist(), df["owner_name"].tolist()
+    ):
+        info = sender_receiver(message_userid, ticket_agentid, owner_name)
+        for column, values in columns.items():
+            values.append(info[column])
+    for column, values in columns.items():
+        df[column] = values
+    df["agent_name"] = "Agent"
+    return df
+
+def measure(flatten: Callable, tickets: List) -> Tuple[float, float, pd.DataFrame]:
+    """Seconds and peak traced MiB of one run (the input is allocated before tracing starts)."""
+    gc.collect()
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    df = flatten(tickets)
+    seconds = time.perf_counter() - started_at
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20, df
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--groups", type=int, default=10, help="Message groups per ticket.")
+    args = parser.parse_args()
+
+    random.seed(0)
+    tickets = [
+        (f"t{i:06d}", f"Customer {i}", f"agent{i % 20:02d}", message_page(args.groups, html_size=2))
+        for i in range(args.tickets)
+    ]
+
+    results = {name: measure(flatten, tickets) for name, flatten in [("row dicts", flatten_rows), ("columns", flatten_columns)]}
+    rows_df, columns_df = results["row dicts"][2], results["columns"][2]
+    pd.testing.assert_frame_equal(rows_df, columns_df[rows_df.columns])
+
+    print(f"{len(columns_df)} rows from {args.tickets} tickets\n")
+    print(f"{'path':<12}{'seconds':>10}{'peak MiB':>12}")
+    for name, (seconds, peak, _) in results.items():
+        print(f"{name:<12}{seconds:>10.3f}{peak:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: memory held by a window of flattened messages, with and without string interning.
+
+Each ticket's message pages are decoded from JSON bytes (orjson, as `LiveAgentClient` does), so every
+page brings fresh copies of the same user ids, names and codes. The decoded pages are dropped after
+flattening, as in the pipeline; what is measured is the memory still held by the resulting frame.
+
+    python -m benchmarks.bench_message_intern [--tickets 5000] [--groups 10] [--users 500]
+"""
+from benchmarks.bench_json_decode import message_page
+from core.MessageColumns import MessageColumns
+from utils.json_utils import fast_loads
+from typing import List, Tuple
+import tracemalloc
+import argparse
+import random
+import orjson
+import time
+import gc
+
+def ticket_bodies(tickets: int, groups: int, users: int) -> List[Tuple[str, str, str, bytes]]:
+    """Message pages for `tickets` tickets; user ids and names drawn from `users` customers and 20 agents."""
+    customers = [f"{random.getrandbits(32):08x}" for _ in range(users)]
+    agents = [f"{random.getrandbits(32):08x}" for _ in range(20)]
+    bodies = []
+    for i in range(tickets):
+        customer, agent = random.choice(customers), random.choice(agents)
+        page = message_page(groups, html_size=2)
+        for group in page:
+            group["userid"] = random.choice([customer, agent])
+            group["user_full_name"] = f"Customer {customer}"
+            for message in group["messages"]:
+                message["userid"] = group["userid"]
+        bodies.append((f"t{i:06d}", f"Customer {customer}", agent, orjson.dumps(page)))
+    return bodies
+
+def measure(intern_strings: bool, bodies: List[Tuple[str, str, str, bytes]]) -> Tuple[float, float, float, int]:
+    """Seconds, peak and retained traced MiB, and row count of one flatten."""
+    gc.collect()
+    tracemalloc.start()
+    started_at = time.perf_counter()
+    columns = MessageColumns(intern_strings=intern_strings)
+    for ticket_id, owner_name, agentid, body in bodies:
+        columns.append_ticket(ticket_id, owner_name, agentid, fast_loads(body))
+    df = columns.to_frame()
+    del columns
+    seconds = time.perf_counter() - started_at
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20, retained / 2**20, len(df)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--groups", type=int, default=10, help="Message groups per ticket (2 messages each).")
+    parser.add_argument("--users", type=int, default=500, help="Distinct customers across the window.")
+    args = parser.parse_args()
+
+    random.seed(0)
+    bodies = ticket_bodies(args.tickets, args.groups, args.users)
+
+    print(f"{'interning':<12}{'rows':>10}{'seconds':>10}{'peak MiB':>12}{'held MiB':>12}")
+    for intern_strings in (False, True):
+        seconds, peak, retained, rows = measure(intern_strings, bodies)
+        print(f"{'on' if intern_strings else 'off':<12}{rows:>10}{seconds:>10.3f}{peak:>12.1f}{retained:>12.1f}")
+
+if __name__ == "__main__":
+    main()
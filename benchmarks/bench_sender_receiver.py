@@ -0,0 +1,85 @@
+"""
+Benchmark: per-message sender/receiver loop vs `resolve_sender_receiver` on whole columns.
+
+The loop is the per-message implementation `resolve_sender_receiver` replaced, kept here only as the
+baseline and correctness oracle: one `sender_receiver` call (and a new 4-key dict) per message, plus an
+agent lookup for `agent_name`.
+
+    python -m benchmarks.bench_sender_receiver [--sizes 10000 100000 1000000]
+"""
+from config.constants import LIVEAGENT_MGO_SYSTEM_USER_ID, LIVEAGENT_MGO_SPECIAL_USER_ID
+from core.SenderReceiver import resolve_sender_receiver
+from typing import Any, Dict
+import pandas as pd
+import argparse
+import random
+import time
+
+def sender_receiver(agent_cache: Dict[str, Dict[str, Any]], message_userid: str, ticket_agentid: str, owner_name: str) -> Dict[str, str]:
+    if message_userid == LIVEAGENT_MGO_SYSTEM_USER_ID:
+        return {"sender_name": "System", "sender_type": "system", "receiver_name": owner_name, "receiver_type": "client"}
+    if message_userid == LIVEAGENT_MGO_SPECIAL_USER_ID:
+        return {"sender_name": "MechaniGo.ph", "sender_type": "system", "receiver_name": owner_name, "receiver_type": "client"}
+    if message_userid in agent_cache:
+        agent_name = agent_cache[message_userid].get("name", "Unknown Agent")
+        return {"sender_name": agent_name, "sender_type": "agent", "receiver_name": owner_name, "receiver_type": "client"}
+
+    agent_info = agent_cache.get(ticket_agentid)
+    if agent_info:
+        agent_name = "MechaniGo.ph" if agent_info["id"] == LIVEAGENT_MGO_SPECIAL_USER_ID else agent_info.get("name", "Unknown Agent")
+    else:
+        agent_name = "Unknown Agent"
+    return {"sender_name": owner_name, "sender_type": "client", "receiver_name": agent_name, "receiver_type": "agent"}
+
+def resolve_loop(messages: pd.DataFrame, agent_cache: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    columns = {"sender_name": [], "sender_type": [], "receiver_name": [], "receiver_type": []}
+    agent_names = []
+    for message_userid, ticket_agentid, owner_name in zip(
+        messages["userid"].tolist(), messages["agentid"].tolist(), messages["owner_name"].tolist()
+    ):
+        info = sender_receiver(agent_cache, message_userid, ticket_agentid, owner_name)
+        for column, values in columns.items():
+            values.append(info[column])
+        agent_info = agent_cache.get(ticket_agentid)
+        agent_names.append(agent_info["name"] if agent_info else "Unknown Agent")
+    return pd.DataFrame({**columns, "agent_name": agent_names}, index=messages.index)
+
+def message_frame(size: int, agent_cache: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """Messages from customers, agents (including one not in the cache) and the two system users."""
+    agent_ids = list(agent_cache) + ["gone0001"]
+    customers = [f"c{i:07d}" for i in range(max(1, size // 20))]
+    senders = [LIVEAGENT_MGO_SYSTEM_USER_ID, LIVEAGENT_MGO_SPECIAL_USER_ID, None]
+    rows = []
+    for i in range(size):
+        customer = random.choice(customers)
+        roll = random.random()
+        userid = random.choice(senders) if roll < 0.05 else random.choice(agent_ids) if roll < 0.45 else customer
+        rows.append((userid, random.choice(agent_ids), f"Customer {customer}"))
+    return pd.DataFrame(rows, columns=["userid", "agentid", "owner_name"])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    random.seed(0)
+    agent_cache = {f"agent{i:03d}": {"id": f"agent{i:03d}", "name": f"Agent {i}"} for i in range(40)}
+    agent_cache[LIVEAGENT_MGO_SPECIAL_USER_ID] = {"id": LIVEAGENT_MGO_SPECIAL_USER_ID, "name": "MechaniGo"}
+
+    print(f"{'messages':>10}{'loop s':>10}{'vector s':>10}{'speedup':>10}")
+    for size in args.sizes:
+        messages = message_frame(size, agent_cache)
+
+        started_at = time.perf_counter()
+        expected = resolve_loop(messages, agent_cache)
+        loop_seconds = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        resolved = resolve_sender_receiver(messages, agent_cache)
+        vector_seconds = time.perf_counter() - started_at
+
+        pd.testing.assert_frame_equal(expected, resolved, check_dtype=False)
+        print(f"{size:>10}{loop_seconds:>10.3f}{vector_seconds:>10.3f}{loop_seconds / vector_seconds:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -22,4 +22,18 @@ if not GEMINI_API_KEY:
 if missing_keys:
     print(f"Missing API keys: {', '.join(missing_keys)}")
 
-MNL_TZ = pytz.timezone("Asia/Manila")
\ No newline at end of file
+MNL_TZ = pytz.timezone("Asia/Manila")
+
+# Record/replay of LiveAgent traffic: "off", "record" or "replay"
+LIVEAGENT_CASSETTE_MODE = os.getenv('LIVEAGENT_CASSETTE_MODE', 'off')
+LIVEAGENT_CASSETTE_DIR = os.getenv('LIVEAGENT_CASSETTE_DIR', '.cassettes/liveagent')
+LIVEAGENT_CASSETTE_LATENCY_MS = float(os.getenv('LIVEAGENT_CASSETTE_LATENCY_MS', '0'))
+LIVEAGENT_CASSETTE_429_RATE = float(os.getenv('LIVEAGENT_CASSETTE_429_RATE', '0'))
+
+# Rate-limit backend shared by all instances: "memory" (per process), "sqlite" (per host) or "redis"
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+RATE_LIMIT_SQLITE_PATH = os.getenv('RATE_LIMIT_SQLITE_PATH', '.sync_state/rate_limit.sqlite3')
+
+# Local snapshot of the user/agent directory, so a restarted instance starts warm
+USER_DIRECTORY_PATH = os.getenv('USER_DIRECTORY_PATH', '.sync_state/user_directory.sqlite3')
\ No newline at end of file
@@ -3,7 +3,22 @@ Static, non-sensitive constants used throughout the application.
 """
 APP_VERSION = "v1"
 BASE_URL = "https://mechanigo.ladesk.com/api/v3"
-THROTTLE_DELAY = 0.4
+
+# LiveAgent API v3 allows 180 requests per minute per account
+RATE_LIMIT_PER_MINUTE = 180
+RATE_LIMIT_BURST = 10
+# Bucket key in shared rate-limit backends; one bucket per LiveAgent account
+RATE_LIMIT_KEY = "liveagent:rate_limit"
+
+# Retries for throttled (429), server-side (5xx) and timed-out requests
+MAX_RETRIES = 4
+RETRY_BACKOFF_BASE = 1.0
+RETRY_BACKOFF_MAX = 30.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker per LiveAgent route: consecutive failed attempts before opening, seconds before a trial request
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
 
 LIVEAGENT_MGO_SYSTEM_USER_ID = "system00"
 LIVEAGENT_MGO_SPECIAL_USER_ID = "00054iwg"
@@ -11,9 +26,69 @@ LIVEAGENT_MGO_SPECIAL_USER_ID = "00054iwg"
 # BigQuery
 PROJECT_ID = "mechanigo-liveagent"
 DATASET_NAME = "conversations"
+# Ids bound to one `UNNEST(@ids)` query parameter; larger id sets are split across jobs
+BQ_QUERY_ID_CHUNK_SIZE = 10_000
+# Threads for blocking BigQuery calls made from async code, and how often running jobs are polled
+BQ_MAX_WORKERS = 8
+BQ_JOB_POLL_INTERVAL = 0.2
+BQ_JOB_POLL_MAX_INTERVAL = 2.0
+
+# Incremental sync
+WATERMARK_TABLE = "sync_watermarks"
+WATERMARK_LOCAL_PATH = ".sync_state/watermarks.json"
+TICKETS_WATERMARK_KEY = "tickets.date_changed"
+# Re-read before the watermark: tickets changed in its second, or skipped when the offset pages shifted mid-run
+TICKETS_WATERMARK_OVERLAP_SECONDS = 600
+TICKET_SYNC_STATE_TABLE = "ticket_sync_state"
+
+# In-memory user/agent directory kept across runs
+USER_DIRECTORY_MAX_USERS = 50_000
+USER_DIRECTORY_USER_TTL_SECONDS = 7 * 24 * 3600
+USER_DIRECTORY_AGENT_TTL_SECONDS = 24 * 3600
 
 MAX_VALUE = 100
 MAX_CONCURRENT_REQUESTS = 15
+# Request scheduler lanes, highest priority first, and the share of MAX_CONCURRENT_REQUESTS each may hold
+TICKETS_LANE = "tickets"
+MESSAGES_LANE = "messages"
+USERS_LANE = "users"
+REQUEST_LANE_SHARES = {
+    TICKETS_LANE: 1.0,
+    MESSAGES_LANE: 0.8,
+    USERS_LANE: 0.4
+}
+# Adaptive (AIMD) concurrency: starts at MAX_CONCURRENT_REQUESTS and moves between the min and max
+AIMD_MIN_CONCURRENCY = 2
+AIMD_MAX_CONCURRENCY = 30
+AIMD_INCREASE_STEP = 1
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_LATENCY_P95_SECONDS = 5.0
+AIMD_MAX_ERROR_RATE = 0.05
+AIMD_WINDOW_SIZE = 50
+AIMD_DECREASE_COOLDOWN_SECONDS = 5.0
+
+# Shared HTTP connection pools
+HTTP_POOL_LIMIT = 100
+HTTP_POOL_LIMIT_PER_HOST = AIMD_MAX_CONCURRENCY
+HTTP_DNS_TTL_SECONDS = 300
+HTTP_KEEPALIVE_SECONDS = 60
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 60
+
+# Processed messages are loaded to BigQuery in chunks of at most this many rows or bytes
+SINK_CHUNK_MAX_ROWS = 20_000
+SINK_CHUNK_MAX_BYTES = 64 * 2**20
+# Tickets whose messages are fetched and processed together in the staged extraction
+MESSAGE_TICKET_BATCH_SIZE = 200
+# Ticket pages whose messages the pipelined extraction fetches and processes at once
+PIPELINE_MAX_PAGE_TASKS = 4
+
+# Number of pages requested concurrently when paginating large listings
+PAGE_PREFETCH_WINDOW = 5
+# Number of fetched pages held for a streaming consumer before fetching pauses
+PAGE_BUFFER_SIZE = 2
+# Windows that still exceed the page cap are not split below this size
+MIN_SPLIT_WINDOW_SECONDS = 60
 
 # For testing purposes
 TEST_MAX_PAGE = 10
@@ -0,0 +1,123 @@
+from config.constants import BQ_MAX_WORKERS, BQ_JOB_POLL_INTERVAL, BQ_JOB_POLL_MAX_INTERVAL, BQ_QUERY_ID_CHUNK_SIZE
+from concurrent.futures import ThreadPoolExecutor
+from google.cloud.bigquery import SchemaField
+from google.cloud.exceptions import NotFound
+from core.BigQueryManager import BigQuery
+from google.cloud import bigquery
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+import pandas as pd
+import functools
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+T = TypeVar("T")
+
+# Shared by every `AsyncBigQuery`, so BigQuery work never takes more than BQ_MAX_WORKERS threads
+bigquery_executor = ThreadPoolExecutor(max_workers=BQ_MAX_WORKERS, thread_name_prefix="bigquery")
+
+class AsyncBigQuery:
+    """
+    Async facade over `BigQuery` for code running on the event loop.
+
+    Blocking client calls (job submission, metadata requests, DataFrame conversion) run on the bounded
+    `bigquery_executor`. Query and load jobs are polled with `asyncio.sleep` between checks, backing off
+    from `poll_interval` to `max_poll_interval`, so a long job holds no thread while BigQuery runs it.
+
+    Multi-step sync helpers (`prepare_and_load_to_bq`, `WatermarkStore`, ...) go through `run`, which
+    runs them on the same pool.
+    """
+    def __init__(
+        self,
+        bigquery_client: BigQuery = None,
+        executor: ThreadPoolExecutor = None,
+        poll_interval: float = BQ_JOB_POLL_INTERVAL,
+        max_poll_interval: float = BQ_JOB_POLL_MAX_INTERVAL
+    ):
+        self.sync = bigquery_client or BigQuery()
+        self.executor = executor or bigquery_executor
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    @property
+    def client(self) -> bigquery.Client:
+        return self.sync.client
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on the BigQuery thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def wait_for_job(self, job: bigquery.QueryJob | bigquery.LoadJob):
+        """Wait for `job` without holding a thread, then raise its error if it failed."""
+        interval = self.poll_interval
+        # `done()` reloads the job state over HTTP, so it runs on the pool too
+        while not await self.run(job.done):
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+        return await self.run(job.result)
+
+    async def ensure_dataset(self):
+        await self.run(self.sync.ensure_dataset)
+
+    async def ensure_table(self, table_name: str, schema: List[SchemaField] = None):
+        await self.run(self.sync.ensure_table, table_name, schema)
+
+    def generate_schema(self, df: pd.DataFrame) -> List[SchemaField]:
+        # Pure pandas work on the caller's frame, no I/O
+        return self.sync.generate_schema(df)
+
+    async def load_dataframe(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        write_disposition: str = "WRITE_APPEND",
+        schema: SchemaField = None
+    ):
+        table_id = self.sync.table_id(table_name)
+
+        try:
+            # Serializing and uploading the frame happens on the pool; the load job itself is polled
+            job = await self.run(
+                self.client.load_table_from_dataframe,
+                df,
+                table_id,
+                job_config=self.sync.load_job_config(write_disposition, schema)
+            )
+            await self.wait_for_job(job)
+        except NotFound:
+            raise ValueError(f"Table {table_id} not found.")
+        except Exception as e:
+            raise RuntimeError(f"Failed to load data into {table_id}: {e}")
+
+    async def sql_query_bq(
+        self,
+        query: str,
+        return_data: bool = True,
+        params: List[bigquery.ScalarQueryParameter | bigquery.ArrayQueryParameter] = None
+    ) -> Optional[pd.DataFrame]:
+        query_job = await self.run(self.client.query, query, job_config=self.sync.query_job_config(params))
+        await self.wait_for_job(query_job)
+        if return_data:
+            return await self.run(query_job.to_dataframe)
+        return None
+
+    async def query_ids(
+        self,
+        query: str,
+        ids: Iterable[str],
+        chunk_size: int = BQ_QUERY_ID_CHUNK_SIZE
+    ) -> pd.DataFrame:
+        """Async `BigQuery.query_ids`; the chunks run as concurrent jobs."""
+        ids = list(ids)
+        frames = await asyncio.gather(*[
+            self.sql_query_bq(query, params=self.sync.ids_param(ids[i:i + chunk_size]))
+            for i in range(0, len(ids), chunk_size)
+        ])
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
@@ -1,8 +1,9 @@
 from config.bq_config import BQ_CLIENT, BQ_DATASET_NAME
+from config.constants import BQ_QUERY_ID_CHUNK_SIZE
 from google.cloud.bigquery import SchemaField
 from google.cloud.exceptions import NotFound
 from google.cloud import bigquery
-from typing import List
+from typing import Iterable, List
 import pandas as pd
 import logging
 
@@ -44,6 +45,25 @@ class BigQuery:
             created_table.expires = None
             self.client.update_table(created_table, ["expires"])
 
+    def table_id(self, table_name: str) -> str:
+        return f"{self.client.project}.{self.dataset_id}.{table_name}"
+
+    def load_job_config(self, write_disposition: str = "WRITE_APPEND", schema: SchemaField = None) -> bigquery.LoadJobConfig:
+        return bigquery.LoadJobConfig(
+            schema=schema,
+            write_disposition=write_disposition,
+            autodetect=schema is None
+        )
+
+    def query_job_config(
+        self,
+        params: List[bigquery.ScalarQueryParameter | bigquery.ArrayQueryParameter] = None
+    ) -> bigquery.QueryJobConfig:
+        return bigquery.QueryJobConfig(query_parameters=params) if params else None
+
+    def ids_param(self, ids: List[str]) -> List[bigquery.ArrayQueryParameter]:
+        return [bigquery.ArrayQueryParameter("ids", "STRING", ids)]
+
     def load_dataframe(
         self,
         df: pd.DataFrame,
@@ -51,17 +71,13 @@ class BigQuery:
         write_disposition: str = "WRITE_APPEND",
         schema: SchemaField = None
     ):
-        table_id = f"{self.client.project}.{self.dataset_id}.{table_name}"
+        table_id = self.table_id(table_name)
 
         try:
             job = self.client.load_table_from_dataframe(
                 df,
                 table_id,
-                job_config=bigquery.LoadJobConfig(
-                    schema=schema,
-                    write_disposition=write_disposition,
-                    autodetect=schema is None
-                )
+                job_config=self.load_job_config(write_disposition, schema)
             )
             job.result()
         except NotFound:
@@ -113,11 +129,36 @@ class BigQuery:
             )
         return schema
 
-    def sql_query_bq(self, query: str, return_data: bool = True) -> pd.DataFrame:
-        query_job = self.client.query(query)
+    def sql_query_bq(
+        self,
+        query: str,
+        return_data: bool = True,
+        params: List[bigquery.ScalarQueryParameter | bigquery.ArrayQueryParameter] = None
+    ) -> pd.DataFrame:
+        query_job = self.client.query(query, job_config=self.query_job_config(params))
         if return_data:
             df = query_job.to_dataframe()
             return df
         else:
             query_job.result()
-            return None
\ No newline at end of file
+            return None
+
+    def query_ids(
+        self,
+        query: str,
+        ids: Iterable[str],
+        chunk_size: int = BQ_QUERY_ID_CHUNK_SIZE
+    ) -> pd.DataFrame:
+        """
+        Run `query` with its `@ids` array parameter (e.g. `WHERE id IN UNNEST(@ids)`) bound to `ids`,
+        `chunk_size` ids per job, and concatenate the results. Unlike ids pasted into an `IN (...)` literal,
+        the query text stays the same size and is never re-parsed per id list.
+        """
+        ids = list(ids)
+        frames = [
+            self.sql_query_bq(query, params=self.ids_param(ids[i:i + chunk_size]))
+            for i in range(0, len(ids), chunk_size)
+        ]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
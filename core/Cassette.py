@@ -0,0 +1,225 @@
+from config.config import (
+    LIVEAGENT_CASSETTE_MODE,
+    LIVEAGENT_CASSETTE_DIR,
+    LIVEAGENT_CASSETTE_LATENCY_MS,
+    LIVEAGENT_CASSETTE_429_RATE
+)
+from config.constants import RETRYABLE_STATUS_CODES
+from typing import Dict, Optional, Any
+import asyncio
+import aiohttp
+import hashlib
+import logging
+import random
+import base64
+import gzip
+import json
+import os
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recording exists for a request."""
+
+class CassetteResponse:
+    """
+    Recorded response exposing the subset of `aiohttp.ClientResponse` that `LiveAgentClient`
+    reads: `status`, `headers`, `content_type`, `charset`, `read()` and `async with`.
+    """
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        content_type: str = "application/json",
+        charset: Optional[str] = "utf-8"
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.content_type = content_type
+        self.charset = charset
+
+    async def read(self) -> bytes:
+        return self.body
+
+    async def text(self) -> str:
+        return self.body.decode(self.charset or "utf-8", errors="replace")
+
+    def release(self):
+        pass
+
+    async def __aenter__(self) -> "CassetteResponse":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "headers": self.headers,
+            "content_type": self.content_type,
+            "charset": self.charset,
+            "body": base64.b64encode(self.body).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CassetteResponse":
+        return cls(
+            status=data["status"],
+            headers=data.get("headers") or {},
+            body=base64.b64decode(data.get("body") or ""),
+            content_type=data.get("content_type", "application/json"),
+            charset=data.get("charset")
+        )
+
+class Cassette:
+    """
+    Record/replay transport for LiveAgent requests.
+
+    In `record` mode every live response is written to `<directory>/<key>.json.gz`, keyed on
+    method, URL and params (never the API key). In `replay` mode responses are served from those
+    files without touching the network; `latency_ms` adds a per-request delay and `error_rate`
+    answers that fraction of requests with a 429, so retry and rate-limit behaviour can be
+    benchmarked deterministically (`seed`).
+    """
+    def __init__(
+        self,
+        mode: str = "off",
+        directory: str = LIVEAGENT_CASSETTE_DIR,
+        latency_ms: float = 0,
+        error_rate: float = 0,
+        retry_after: float = 1,
+        seed: Optional[int] = 0
+    ):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}. Expected one of {CASSETTE_MODES}.")
+        if not 0 <= error_rate < 1:
+            raise ValueError("error_rate must be in [0, 1).")
+
+        self.mode = mode
+        self.directory = directory
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.entries: Dict[str, CassetteResponse] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.injected_429s = 0
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            mode=LIVEAGENT_CASSETTE_MODE,
+            directory=LIVEAGENT_CASSETTE_DIR,
+            latency_ms=LIVEAGENT_CASSETTE_LATENCY_MS,
+            error_rate=LIVEAGENT_CASSETTE_429_RATE
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def key(self, method: str, url: str, params: Optional[Dict[str, Any]]) -> str:
+        params_key = sorted((str(key), str(value)) for key, value in (params or {}).items())
+        raw = json.dumps([method.upper(), url, params_key])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _load(self, key: str) -> Optional[CassetteResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            try:
+                with gzip.open(self._path(key), "rt", encoding="utf-8") as f:
+                    entry = CassetteResponse.from_dict(json.load(f)["response"])
+            except FileNotFoundError:
+                return None
+            self.entries[key] = entry
+        return entry
+
+    def _save(self, key: str, request: Dict[str, Any], response: CassetteResponse):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"request": request, "response": response.to_dict()}, f)
+        os.replace(tmp_path, path)
+
+    async def replay(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> CassetteResponse:
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.injected_429s += 1
+            return CassetteResponse(
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+                body=b'{"message": "Too many requests (injected)"}'
+            )
+
+        key = self.key(method, url, params)
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            raise CassetteMissError(f"No cassette entry for {method} {url} {params or {}}")
+        self.hits += 1
+        return entry
+
+    async def record(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        response: aiohttp.ClientResponse
+    ) -> CassetteResponse:
+        """Read and release a live response, save it, and return the recorded copy in its place."""
+        async with response:
+            recorded = CassetteResponse(
+                status=response.status,
+                headers=dict(response.headers),
+                body=await response.read(),
+                content_type=response.content_type,
+                charset=response.charset
+            )
+
+        # Throttled and failed attempts are retried, so only the final answer is kept
+        if recorded.status not in RETRYABLE_STATUS_CODES:
+            request = {"method": method.upper(), "url": url, "params": params}
+            key = self.key(method, url, params)
+            await asyncio.to_thread(self._save, key, request, recorded)
+            self.entries[key] = recorded
+            self.recorded += 1
+        return recorded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "injected_429s": self.injected_429s
+        }
+
+# Shared default, configured from the environment (off unless LIVEAGENT_CASSETTE_MODE is set)
+liveagent_cassette = Cassette.from_env()
@@ -0,0 +1,152 @@
+from config.constants import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS
+from typing import Dict, Iterable, List, Optional, Any
+from enum import Enum
+import logging
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the route's circuit is open."""
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+def route_of(endpoint: str) -> str:
+    """
+    Route template of an endpoint, so every ticket or user shares one breaker:
+    `tickets/abc123/messages` -> `tickets/:id/messages`, `users/xyz` -> `users/:id`.
+    """
+    segments = endpoint.strip("/").split("/")
+    return "/".join(":id" if i % 2 else segment for i, segment in enumerate(segments))
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failed attempts; while open every call is
+    refused without touching the network. After `reset_seconds` one trial call is let through
+    (half-open): success closes the circuit, failure opens it for another `reset_seconds`.
+    """
+    def __init__(
+        self,
+        route: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.route = route
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trial_started_at = 0.0
+
+        self.total_failures = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. In half-open state only one trial request is allowed at a time."""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.total_rejected += 1
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.trial_in_flight = False
+            logging.info(f"Circuit for {self.route} half-open, sending a trial request")
+
+        if self.state == CircuitState.HALF_OPEN:
+            # A trial that never reported back (e.g. cancelled) stops blocking after `reset_seconds`
+            if self.trial_in_flight and time.monotonic() - self.trial_started_at < self.reset_seconds:
+                self.total_rejected += 1
+                return False
+            self.trial_in_flight = True
+            self.trial_started_at = time.monotonic()
+
+        return True
+
+    @property
+    def is_open(self) -> bool:
+        """Open and still inside the reset window (no side effects, unlike `allow`)."""
+        return self.state == CircuitState.OPEN and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def record_success(self):
+        if self.state != CircuitState.CLOSED:
+            logging.info(f"Circuit for {self.route} closed")
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_throttled(self):
+        """A 429 says nothing about the route's health: keep the state, only free the half-open trial slot."""
+        self.trial_in_flight = False
+
+    def record_failure(self, error: Optional[str] = None):
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        self.last_error = error
+        self.trial_in_flight = False
+
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != CircuitState.OPEN:
+                self.times_opened += 1
+                logging.error(
+                    f"Circuit for {self.route} opened after {self.consecutive_failures} consecutive failures: {error}"
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        retry_in = self.reset_seconds - (time.monotonic() - self.opened_at)
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejected": self.total_rejected,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": round(retry_in, 1) if self.state == CircuitState.OPEN and retry_in > 0 else None,
+            "last_error": self.last_error
+        }
+
+class CircuitBreakerRegistry:
+    """One `CircuitBreaker` per route template, created on first use."""
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        route = route_of(endpoint)
+        breaker = self.breakers.get(route)
+        if breaker is None:
+            breaker = CircuitBreaker(route, self.failure_threshold, self.reset_seconds)
+            self.breakers[route] = breaker
+        return breaker
+
+    def open_routes(self, routes: Iterable[str] = None) -> List[str]:
+        """
+        Routes still inside their reset window, optionally limited to `routes`. A route that opened in
+        an earlier run and has not been called since is not reported once its window has passed.
+        """
+        if routes is not None:
+            routes = set(routes)
+        return [
+            route for route, breaker in self.breakers.items()
+            if breaker.is_open and (routes is None or route in routes)
+        ]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {route: breaker.stats() for route, breaker in self.breakers.items()}
+
+# Shared across every `LiveAgentClient` in the process, so one run's failures protect the next
+liveagent_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,186 @@
+from config.constants import (
+    MAX_CONCURRENT_REQUESTS,
+    AIMD_MIN_CONCURRENCY,
+    AIMD_MAX_CONCURRENCY,
+    AIMD_INCREASE_STEP,
+    AIMD_DECREASE_FACTOR,
+    AIMD_LATENCY_P95_SECONDS,
+    AIMD_MAX_ERROR_RATE,
+    AIMD_WINDOW_SIZE,
+    AIMD_DECREASE_COOLDOWN_SECONDS
+)
+from core.RequestScheduler import RequestScheduler
+from typing import Deque, Dict, Optional, Tuple, Any
+from collections import deque
+import logging
+import weakref
+import math
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease limit on concurrent LiveAgent requests.
+
+    Every request attempt is recorded with its latency and outcome. A 429 or a timeout cuts the
+    limit by `decrease_factor` right away; otherwise, once `limit` requests have completed since the
+    last change, the recent window is checked: a p95 latency above `latency_p95` or an error rate
+    above `max_error_rate` also cuts the limit, and a healthy window raises it by `increase_step`.
+    Cuts are at most one per `cooldown` seconds, so a burst of 429s from one overload counts once.
+
+    The limit is applied to every attached `RequestScheduler`.
+    """
+    def __init__(
+        self,
+        initial_limit: int = MAX_CONCURRENT_REQUESTS,
+        min_limit: int = AIMD_MIN_CONCURRENCY,
+        max_limit: int = AIMD_MAX_CONCURRENCY,
+        increase_step: int = AIMD_INCREASE_STEP,
+        decrease_factor: float = AIMD_DECREASE_FACTOR,
+        latency_p95: float = AIMD_LATENCY_P95_SECONDS,
+        max_error_rate: float = AIMD_MAX_ERROR_RATE,
+        window_size: int = AIMD_WINDOW_SIZE,
+        cooldown: float = AIMD_DECREASE_COOLDOWN_SECONDS
+    ):
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= max_limit.")
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be in (0, 1).")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(max_limit, initial_limit))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_p95 = latency_p95
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+
+        # (latency seconds, failed) of the most recent attempts
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window_size)
+        self.completed_since_change = 0
+        self.last_decrease_at = 0.0
+        self.schedulers: "weakref.WeakSet[RequestScheduler]" = weakref.WeakSet()
+
+        self.total_samples = 0
+        self.increases = 0
+        self.decreases = 0
+        self.last_decrease_reason: Optional[str] = None
+
+    def attach(self, scheduler: RequestScheduler):
+        """Keep `scheduler`'s in-flight limit in sync with this controller."""
+        self.schedulers.add(scheduler)
+        scheduler.resize(self.limit)
+
+    def _set_limit(self, limit: int):
+        self.limit = limit
+        self.completed_since_change = 0
+        for scheduler in list(self.schedulers):
+            scheduler.resize(limit)
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        latencies = sorted(latency for latency, _ in self.samples)
+        return latencies[min(len(latencies) - 1, math.ceil(q * len(latencies)) - 1)]
+
+    def _error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, failed in self.samples if failed) / len(self.samples)
+
+    def _increase(self):
+        if self.limit < self.max_limit:
+            self.increases += 1
+            self._set_limit(min(self.max_limit, self.limit + self.increase_step))
+        else:
+            self.completed_since_change = 0
+
+    def _decrease(self, reason: str):
+        now = time.monotonic()
+        if now - self.last_decrease_at < self.cooldown:
+            return
+
+        new_limit = max(self.min_limit, math.floor(self.limit * self.decrease_factor))
+        self.last_decrease_at = now
+        self.last_decrease_reason = reason
+        # Samples taken under the old limit would only trigger another cut
+        self.samples.clear()
+        if new_limit < self.limit:
+            self.decreases += 1
+            logging.warning(f"Concurrency limit cut from {self.limit} to {new_limit} ({reason})")
+        self._set_limit(new_limit)
+
+    def record(self, latency: float, status_code: Optional[int] = None, timed_out: bool = False):
+        """Record one request attempt: its latency in seconds and either its HTTP status or a timeout."""
+        failed = timed_out or status_code is None or status_code == 429 or status_code >= 500
+        self.samples.append((latency, failed))
+        self.total_samples += 1
+        self.completed_since_change += 1
+
+        if timed_out or status_code == 429:
+            self._decrease("timeout" if timed_out else "429")
+            return
+
+        if self.completed_since_change < self.limit:
+            return
+
+        p95 = self._percentile(0.95)
+        if p95 is not None and p95 > self.latency_p95:
+            self._decrease(f"p95 latency {p95:.2f}s")
+        elif self._error_rate() > self.max_error_rate:
+            self._decrease(f"error rate {self._error_rate():.0%}")
+        else:
+            self._increase()
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self._percentile(0.95)
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "p95_latency_seconds": round(p95, 3) if p95 is not None else None,
+            "error_rate": round(self._error_rate(), 4),
+            "window_samples": len(self.samples),
+            "total_samples": self.total_samples,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "last_decrease_reason": self.last_decrease_reason,
+            "schedulers": len(self.schedulers)
+        }
+
+    def scheduler_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue depth and wait times per lane, summed over the attached schedulers (one per live client).
+        Waits are averaged over every acquisition; finished clients drop out once they are collected.
+        """
+        lanes: Dict[str, Dict[str, Any]] = {}
+        for scheduler in list(self.schedulers):
+            for name, lane in scheduler.lanes.items():
+                totals = lanes.setdefault(name, {
+                    "priority": lane.priority,
+                    "active": 0,
+                    "queued": 0,
+                    "total_acquired": 0,
+                    "total_wait_seconds": 0.0,
+                    "max_wait_seconds": 0.0
+                })
+                totals["active"] += lane.active
+                totals["queued"] += len(lane.waiters)
+                totals["total_acquired"] += lane.total_acquired
+                totals["total_wait_seconds"] += lane.total_wait_seconds
+                totals["max_wait_seconds"] = max(totals["max_wait_seconds"], lane.max_wait_seconds)
+
+        for totals in lanes.values():
+            total_wait_seconds = totals.pop("total_wait_seconds")
+            acquired = totals["total_acquired"]
+            totals["avg_wait_seconds"] = round(total_wait_seconds / acquired, 4) if acquired else 0.0
+            totals["max_wait_seconds"] = round(totals["max_wait_seconds"], 4)
+        return lanes
+
+# Shared across every `LiveAgentClient` in the process, like the rate limiter
+liveagent_concurrency = AIMDController()
@@ -1,3 +1,5 @@
+from config.constants import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+from core.HttpTransport import http_sessions, GEOCODING_POOL
 from core.BigQueryManager import BigQuery
 from strsimpy.jaccard import Jaccard
 from utils.geocode_utils import normalize_location, tag_viable, viable
@@ -5,7 +7,6 @@ from typing import Optional, Tuple
 from time import time, sleep
 import pandas as pd
 import numpy as np
-import requests
 import logging
 
 logging.basicConfig(
@@ -21,6 +22,7 @@ class Geocoder:
         self.df_bq = self._load_bq_data()
         self.df_bq_munprov = self._filter_munprov()
         self.time_osm = 0
+        self.http = http_sessions.get_sync(GEOCODING_POOL)
 
     def _load_bq_data(self) -> pd.DataFrame:
         query = "SELECT * FROM `{}.locations.address_location_psgc`".format(self.project_name)
@@ -128,10 +130,11 @@ class Geocoder:
 
     def _geocode_osm(self, address: str) -> Optional[Tuple[float, float]]:
         try:
-            resp = requests.get(
+            resp = self.http.get(
                 "https://nominatim.openstreetmap.org/search",
                 params={"q": address, "format": "json", "limit": 1},
-                headers={"User-Agent": "my_geocoder_app"}
+                headers={"User-Agent": "my_geocoder_app"},
+                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
             )
             resp.raise_for_status()
             data = resp.json()
@@ -143,9 +146,10 @@ class Geocoder:
 
     def _geocode_photon(self, address: str) -> Optional[Tuple[float, float]]:
         try:
-            resp = requests.get(
+            resp = self.http.get(
                 "https://photon.komoot.io/api/",
                 params={"q": address, "limit": 1},
+                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
             )
             resp.raise_for_status()
             features = resp.json().get("features")
@@ -0,0 +1,110 @@
+from config.constants import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_DNS_TTL_SECONDS,
+    HTTP_KEEPALIVE_SECONDS,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT
+)
+from requests.adapters import HTTPAdapter
+from typing import Dict
+import requests
+import aiohttp
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+LIVEAGENT_POOL = "liveagent"
+GEOCODING_POOL = "geocoding"
+
+def accept_encoding() -> str:
+    """`Accept-Encoding` value; `br` is only offered when a Brotli decoder is installed."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+def create_client_session(
+    limit: int = HTTP_POOL_LIMIT,
+    limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+    dns_ttl: int = HTTP_DNS_TTL_SECONDS,
+    keepalive_timeout: float = HTTP_KEEPALIVE_SECONDS,
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+    read_timeout: float = HTTP_READ_TIMEOUT
+) -> aiohttp.ClientSession:
+    """
+    `aiohttp.ClientSession` with a tuned connection pool.
+
+    `limit_per_host` matches the client's in-flight cap, so every request that gets past the
+    rate limiter finds a warm keep-alive connection instead of opening a new one.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive_timeout,
+        enable_cleanup_closed=True
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None,
+        sock_connect=connect_timeout,
+        connect=connect_timeout,
+        sock_read=read_timeout
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={"Accept-Encoding": accept_encoding()},
+        auto_decompress=True
+    )
+
+def create_requests_session(pool_size: int = HTTP_POOL_LIMIT_PER_HOST) -> requests.Session:
+    """Pooled `requests.Session` for synchronous callers (e.g. `Geocoder`)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": accept_encoding()})
+    return session
+
+class SessionRegistry:
+    """
+    Named, shared HTTP connection pools, so every outbound caller reuses warm connections.
+    Pools are created on first use and closed together on app shutdown.
+    """
+    def __init__(self):
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self.sync_sessions: Dict[str, requests.Session] = {}
+
+    def get(self, name: str = LIVEAGENT_POOL) -> aiohttp.ClientSession:
+        session = self.sessions.get(name)
+        if session is None or session.closed:
+            logging.info(f"Creating HTTP pool: {name}")
+            session = create_client_session()
+            self.sessions[name] = session
+        return session
+
+    def get_sync(self, name: str) -> requests.Session:
+        session = self.sync_sessions.get(name)
+        if session is None:
+            logging.info(f"Creating HTTP pool (sync): {name}")
+            session = create_requests_session()
+            self.sync_sessions[name] = session
+        return session
+
+    async def close(self):
+        for name, session in self.sessions.items():
+            if not session.closed:
+                logging.info(f"Closing HTTP pool: {name}")
+                await session.close()
+        for session in self.sync_sessions.values():
+            session.close()
+        self.sessions.clear()
+        self.sync_sessions.clear()
+
+# Global registry instance
+http_sessions = SessionRegistry()
@@ -1,9 +1,29 @@
-from config.constants import BASE_URL, THROTTLE_DELAY, MAX_CONCURRENT_REQUESTS
+from config.constants import (
+    BASE_URL,
+    MAX_RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    RETRYABLE_STATUS_CODES,
+    PAGE_BUFFER_SIZE,
+    TICKETS_LANE
+)
 from api.schemas.response import LiveAgentAPIResponse, ResponseStatus
-from typing import Dict, List, Optional, Any
+from core.RateLimiter import TokenBucket, liveagent_rate_limiter
+from core.Cassette import Cassette, liveagent_cassette
+from core.CircuitBreaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, liveagent_breakers
+from core.ConcurrencyController import AIMDController, liveagent_concurrency
+from core.RequestScheduler import RequestScheduler
+from utils.json_utils import JsonLoads, json_loads as default_json_loads
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Any
+import dataclasses
 import asyncio
 import aiohttp
+import copy
 import logging
+import random
+import math
+import time
 
 # TO DO:
 # 1. Custom Logging
@@ -14,7 +34,22 @@ logging.basicConfig(
 
 class LiveAgentClient:
     """Live Agent base client/class."""
-    def __init__(self, api_key: str, session: aiohttp.ClientSession, max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS):
+    def __init__(
+        self,
+        api_key: str,
+        session: aiohttp.ClientSession,
+        max_concurrent_requests: int = None,
+        rate_limiter: TokenBucket = None,
+        max_retries: int = MAX_RETRIES,
+        json_loads: JsonLoads = None,
+        cassette: Cassette = None,
+        concurrency: AIMDController = None,
+        breakers: CircuitBreakerRegistry = None
+    ):
+        """
+        Without `max_concurrent_requests` the in-flight limit is adaptive: it follows `concurrency`
+        (the shared AIMD controller by default). With it, the limit is fixed at that number.
+        """
         if not api_key:
             raise ValueError("API key cannot be empty.")
 
@@ -22,8 +57,26 @@ class LiveAgentClient:
         self.session = session
         self.base_url = BASE_URL
         self.headers = self.default_headers()
-        self.throttle_delay = THROTTLE_DELAY
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.rate_limiter = rate_limiter or liveagent_rate_limiter
+        self.max_retries = max_retries
+        self.json_loads = json_loads or default_json_loads
+        self.cassette = cassette or liveagent_cassette
+        self.concurrency = concurrency or liveagent_concurrency
+        # One circuit breaker per route template (e.g. `tickets/:id/messages`)
+        self.breakers = breakers or liveagent_breakers
+        # Single in-flight limit, shared by ticket listing, message pages and user lookups in priority order
+        self.scheduler = RequestScheduler(max_concurrent_requests or self.concurrency.limit)
+        if max_concurrent_requests is None:
+            self.concurrency.attach(self.scheduler)
+        # GET requests currently in flight, keyed on method, URL and params (single-flight)
+        self.in_flight: Dict[Tuple[str, str, Tuple[Tuple[str, str], ...]], asyncio.Future] = {}
+        self.coalesced_requests = 0
+        # Endpoints whose pagination stopped on a failed page rather than at the end of the data
+        self.truncated_endpoints: Set[str] = set()
+        # Endpoints whose pagination stopped because their route's circuit refused a page
+        self.circuit_open_endpoints: Set[str] = set()
+        # Route templates this client sent (or tried to send) requests to
+        self.routes_tried: Set[str] = set()
         self.logger = logging.getLogger(__name__)
 
     def default_headers(self) -> Dict[str, str]:
@@ -38,26 +91,61 @@ class LiveAgentClient:
         session: aiohttp.ClientSession,
         method: str,
         url: str,
+        lane: str = TICKETS_LANE,
+        breaker: CircuitBreaker = None,
         **kwargs
     ) -> aiohttp.ClientResponse:
-        """Request with respect to LiveAgent API rate limit. The API rate limit for LiveAgent API v3 is 180 requests per minute."""
-        async with self.semaphore:
-            if self.throttle_delay > 0:
-                await asyncio.sleep(self.throttle_delay)
+        """
+        Request with respect to LiveAgent API rate limit. The API rate limit for LiveAgent API v3 is 180 requests per minute.
+
+        A scheduler slot in `lane` is taken before the rate-limit token, so when tokens are scarce the
+        next one goes to whichever lane the scheduler prioritised, not to whoever queued first.
+        In cassette `replay` mode the response comes from disk instead of `session`; in `record` mode the live
+        response is saved before it is returned.
+
+        The time to the response headers and the status (or timeout) are reported to the concurrency controller.
+        The circuit is checked once the slot is granted, so requests queued before it opened do not go out either.
+        """
+        async with self.scheduler.slot(lane):
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"Circuit for {breaker.route} is open")
+            await self.rate_limiter.acquire()
+            started_at = time.monotonic()
+            try:
+                if self.cassette.replaying:
+                    response = await self.cassette.replay(method, url, kwargs.get("params"))
+                else:
+                    response = await session.request(method, url, **kwargs)
+            except asyncio.TimeoutError:
+                self.concurrency.record(time.monotonic() - started_at, timed_out=True)
+                raise
+            except aiohttp.ClientError:
+                self.concurrency.record(time.monotonic() - started_at)
+                raise
+            self.concurrency.record(time.monotonic() - started_at, response.status)
 
-            return await session.request(method, url, **kwargs)
+            if self.cassette.recording:
+                return await self.cassette.record(method, url, kwargs.get("params"), response)
+            return response
     
     async def _handle_response(
         self,
         response: aiohttp.ClientResponse,
         endpoint: str
     ) -> LiveAgentAPIResponse:
-        """API response parser and handler."""
+        """
+        API response parser and handler.
+
+        The body is read as bytes once and handed straight to `self.json_loads`, skipping the
+        bytes -> str decode that `response.json()` does before the stdlib parser runs.
+        """
+        headers = dict(response.headers)
         try:
+            body = await response.read()
             if response.content_type == "application/json":
-                data = await response.json()
+                data = self.json_loads(body) if body.strip() else None
             else:
-                text = await response.text()
+                text = body.decode(response.charset or "utf-8", errors="replace")
                 data = {"message": text} if text else {"message": "Empty response"}
 
             if 200 <= response.status < 300:
@@ -65,7 +153,8 @@ class LiveAgentClient:
                     success=True,
                     data=data,
                     status_code=response.status,
-                    status=ResponseStatus.SUCCESS
+                    status=ResponseStatus.SUCCESS,
+                    headers=headers
                 )
             else:
                 error_msg = data.get("message", f"HTTP {response.status}") if isinstance(data, dict) else str(data)
@@ -73,31 +162,94 @@ class LiveAgentClient:
                 return LiveAgentAPIResponse(
                     success=False,
                     data=error_msg,
+                    error=error_msg,
                     status_code=response.status,
-                    status=ResponseStatus.ERROR
+                    status=ResponseStatus.ERROR,
+                    headers=headers
                 )
-        except aiohttp.ContentTypeError as e:
+        except ValueError as e:
             error_msg = f"Invalid response from {endpoint}"
             self.logger.error(error_msg)
             return LiveAgentAPIResponse(
                 success=False,
                 data=error_msg,
+                error=error_msg,
                 status_code=response.status,
-                status=ResponseStatus.ERROR
+                status=ResponseStatus.ERROR,
+                headers=headers
             )
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            # A body cut short (stalled read, dropped connection) is transient: `_send_request` retries it
+            raise
         except Exception as e:
-            pass
+            error_msg = f"Failed to read response from {endpoint}: {str(e)}"
+            self.logger.error(error_msg)
+            return LiveAgentAPIResponse(
+                success=False,
+                error=error_msg,
+                status_code=response.status,
+                status=ResponseStatus.ERROR,
+                headers=headers
+            )
 
-    async def make_request(
+    def _parse_retry_after(self, headers: Optional[Dict[str, str]]) -> Optional[float]:
+        """
+        Seconds the server asked us to wait, from `Retry-After` (seconds or HTTP-date)
+        or, when the quota is exhausted, from `X-RateLimit-Reset` (epoch or seconds).
+        """
+        if not headers:
+            return None
+
+        headers = {key.lower(): value for key, value in headers.items()}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        if remaining is not None and reset:
+            try:
+                if int(float(remaining)) > 0:
+                    return None
+                reset = float(reset)
+            except ValueError:
+                return None
+            # Large values are absolute epoch timestamps, small ones are relative seconds
+            return max(0.0, reset - time.time()) if reset > 1_000_000_000 else reset
+
+        return None
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than what the server asked for."""
+        delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, RETRY_BACKOFF_BASE))
+        return delay
+
+    async def _send_request(
         self,
         session: aiohttp.ClientSession,
         endpoint: str,
-        method: str = "GET",
-        params: Optional[Dict[str, Any]] = None,
-    ) -> LiveAgentAPIResponse:
-        endpoint = endpoint.lstrip("/")
-        url = f"{self.base_url}/{endpoint}"
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        lane: str = TICKETS_LANE
+    ) -> Tuple[LiveAgentAPIResponse, bool]:
+        """
+        Single attempt of a request; transport errors are turned into failed responses.
 
+        Returns the response and whether the failure is transient (worth retrying). Transient failures
+        other than 429 count against the route's circuit breaker; while it is open the request is not sent.
+        """
+        breaker = self.breakers.get(endpoint)
+        self.routes_tried.add(breaker.route)
         try:
             self.logger.info(f"Making {method} request to: {url}")
 
@@ -107,25 +259,41 @@ class LiveAgentClient:
             }
 
             async with await self._make_throttled_request(
-                session, method, url, **request_kwargs
+                session, method, url, lane, breaker, **request_kwargs
             ) as response:
-                return await self._handle_response(response, endpoint)
+                result = await self._handle_response(response, endpoint)
+                retryable = result.status_code in RETRYABLE_STATUS_CODES
+                if result.status_code == 429:
+                    breaker.record_throttled()
+                elif retryable:
+                    breaker.record_failure(result.error)
+                else:
+                    breaker.record_success()
+                return result, retryable
+        except CircuitOpenError as e:
+            return LiveAgentAPIResponse(
+                success=False,
+                error=f"{e}, skipped request to {endpoint}",
+                status=ResponseStatus.CIRCUIT_OPEN
+            ), False
         except aiohttp.ClientError as e:
             error_msg = f"Client error for {endpoint}: {str(e)}"
             self.logger.error(error_msg)
+            breaker.record_failure(error_msg)
             return LiveAgentAPIResponse(
                 success=False,
                 error=error_msg,
                 status=ResponseStatus.ERROR
-            )
+            ), True
         except asyncio.TimeoutError:
             error_msg = f"Request to {endpoint} timed out"
             self.logger.error(error_msg)
+            breaker.record_failure(error_msg)
             return LiveAgentAPIResponse(
-                success=True,
+                success=False,
                 error=error_msg,
                 status=ResponseStatus.TIMEOUT
-            )
+            ), True
         except Exception as e:
             error_msg = f"Exception occurred for {endpoint}: {str(e)}"
             self.logger.error(error_msg)
@@ -133,53 +301,273 @@ class LiveAgentClient:
                 success=False,
                 error=error_msg,
                 status=ResponseStatus.ERROR
+            ), False
+
+    async def make_request(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        method: str = "GET",
+        params: Optional[Dict[str, Any]] = None,
+        lane: str = TICKETS_LANE
+    ) -> LiveAgentAPIResponse:
+        """
+        Request an endpoint, retrying 429s, 5xx responses, timeouts and connection errors
+        up to `max_retries` times with jittered exponential backoff.
+
+        A 429 (or an exhausted `X-RateLimit-Remaining`) pauses the shared rate limiter,
+        so every concurrent caller backs off, not only the one that got throttled.
+
+        Concurrent GETs for the same URL and params are coalesced: later callers await the
+        request already in flight instead of spending another rate-limit token. Each of them gets its
+        own copy of the response data, since consumers (e.g. `Ticket._tickets_to_dataframe`) edit it in place.
+
+        `lane` is the scheduler lane (`tickets`, `messages` or `users`) the request waits in for a slot.
+        """
+        endpoint = endpoint.lstrip("/")
+        url = f"{self.base_url}/{endpoint}"
+
+        if method != "GET":
+            return await self._request_with_retries(session, endpoint, method, url, params, lane)
+
+        key = (method, url, self._params_key(params))
+        in_flight = self.in_flight.get(key)
+        if in_flight is None:
+            in_flight = asyncio.ensure_future(
+                self._request_with_retries(session, endpoint, method, url, params, lane)
+            )
+            self.in_flight[key] = in_flight
+            in_flight.add_done_callback(lambda _: self.in_flight.pop(key, None))
+            # Shielded so one caller being cancelled does not cancel the request for the others
+            return await asyncio.shield(in_flight)
+
+        self.coalesced_requests += 1
+        self.logger.info(f"Joining in-flight request to: {url}")
+        response = await asyncio.shield(in_flight)
+        return dataclasses.replace(
+            response,
+            data=copy.deepcopy(response.data),
+            headers=dict(response.headers) if response.headers is not None else None
+        )
+
+    def _params_key(self, params: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted((str(key), str(value)) for key, value in (params or {}).items()))
+
+    async def _request_with_retries(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        lane: str = TICKETS_LANE
+    ) -> LiveAgentAPIResponse:
+        attempt = 0
+        while True:
+            response, retryable = await self._send_request(session, endpoint, method, url, params, lane)
+            retry_after = self._parse_retry_after(response.headers)
+
+            if retry_after is not None:
+                await self.rate_limiter.pause(retry_after)
+
+            if not retryable or attempt >= self.max_retries:
+                if not response.success and attempt > 0:
+                    self.logger.error(f"Giving up on {endpoint} after {attempt + 1} attempts: {response.error}")
+                return response
+
+            delay = self._backoff_delay(attempt, retry_after)
+            if response.status_code == 429:
+                await self.rate_limiter.pause(delay)
+            attempt += 1
+            self.logger.warning(
+                f"Retrying {endpoint} in {delay:.2f}s (attempt {attempt}/{self.max_retries}, "
+                f"status={response.status_code or response.status.value})"
+            )
+            await asyncio.sleep(delay)
+
+    def _total_count(self, response: LiveAgentAPIResponse) -> Optional[int]:
+        """Total number of items for a paginated endpoint, if the API reports it."""
+        headers = {key.lower(): value for key, value in (response.headers or {}).items()}
+        total = headers.get("x-total-count")
+        if total is None and isinstance(response.data, dict):
+            total = response.data.get("total", response.data.get("count"))
+        try:
+            return int(total) if total is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    async def _fetch_page(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        payload: Dict[str, Any],
+        page: int,
+        lane: str = TICKETS_LANE
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[LiveAgentAPIResponse]]:
+        """
+        Fetch a single page. Returns `(items, response)`, where `items` is an empty list when the
+        endpoint has no more data and `None` when the page could not be fetched.
+        """
+        self.logger.info(f"Fetching page {page} from {endpoint}")
+        try:
+            response = await self.make_request(
+                session=session,
+                endpoint=endpoint,
+                params={**payload, "_page": page},
+                lane=lane
             )
 
+            if not response.success:
+                self.logger.error(
+                    f"Request failed at page {page} of {endpoint}, results are truncated: {response.error}"
+                )
+                self.truncated_endpoints.add(endpoint)
+                if response.status == ResponseStatus.CIRCUIT_OPEN:
+                    self.circuit_open_endpoints.add(endpoint)
+                return None, response
+
+            if not response.data:
+                self.logger.warning(f"No data returned at page {page}.")
+                return [], response
+
+            if isinstance(response.data, list):
+                items = response.data
+            elif isinstance(response.data, dict) and "data" in response.data:
+                items = response.data["data"]
+            else:
+                self.logger.warning(f"Unexpected data structure at page {page}.")
+                self.truncated_endpoints.add(endpoint)
+                return None, response
+
+            if not items:
+                self.logger.info(f"No items on page {page}, stopping pagination.")
+            return items, response
+
+        except Exception as e:
+            self.logger.info(f"Error during pagination at page {page}: {e}")
+            self.truncated_endpoints.add(endpoint)
+            return None, None
+
+    async def _iter_pages(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        payload: Dict[str, Any],
+        max_pages: int,
+        prefetch: int = 1,
+        start_page: int = 1,
+        lane: str = TICKETS_LANE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield each non-empty page in page order, starting at `start_page`.
+
+        The first page is fetched alone. If it reports a total count, the exact remaining page set is
+        planned from it; otherwise pages are requested speculatively in windows of `prefetch` pages
+        at a time. Pagination stops at the first empty, short (fewer than `_perPage` items) or failed page.
+        """
+        per_page = payload.get("_perPage")
+        per_page = int(per_page) if per_page else None
+
+        if start_page > max_pages:
+            return
+
+        items, response = await self._fetch_page(session, endpoint, payload, start_page, lane)
+        if not items:
+            return
+        yield items
+        if per_page and len(items) < per_page:
+            return
+
+        last_page = max_pages
+        total = self._total_count(response)
+        if total is not None and per_page:
+            last_page = min(max_pages, math.ceil(total / per_page))
+            self.logger.info(f"{endpoint} reports {total} items, fetching {last_page} page(s).")
+
+        page = start_page + 1
+        while page <= last_page:
+            window = range(page, min(page + max(prefetch, 1), last_page + 1))
+            results = await asyncio.gather(*[
+                self._fetch_page(session, endpoint, payload, window_page, lane)
+                for window_page in window
+            ])
+
+            for items, _ in results:
+                if not items:
+                    return
+                yield items
+                if per_page and len(items) < per_page:
+                    return
+
+            page = window.stop
+
     async def paginate(
         self,
         session: aiohttp.ClientSession,
         endpoint: str,
         payload: Optional[Dict[str, Any]] = None,
-        max_pages: int = 5
+        max_pages: int = 5,
+        prefetch: int = 1,
+        start_page: int = 1,
+        lane: str = TICKETS_LANE
     ) -> List[Dict[str, Any]]:
-        """Generic pagination utility for any LiveAgent endpoint."""
+        """
+        Generic pagination utility for any LiveAgent endpoint.
+
+        With `prefetch > 1`, up to `prefetch` pages are requested concurrently; items are still returned in page order.
+        """
         all_data = []
-        page = 1
 
         if payload is None:
             payload = {}
 
-        while page <= max_pages:
-            payload["_page"] = page
-            self.logger.info(f"Fetching page {page} from {endpoint}")
-            try:
-                response = await self.make_request(
-                    session=session,
-                    endpoint=endpoint,
-                    params=payload
-                )
+        async for items in self._iter_pages(session, endpoint, payload, max_pages, prefetch, start_page, lane):
+            all_data.extend(items)
 
-                if not response.success or not response.data:
-                    self.logger.warning(f"No data returned or request failed at page {page}.")
-                    break
+        return all_data
 
-                if isinstance(response.data, list):
-                    items = response.data
-                elif isinstance(response.data, dict) and "data" in response.data:
-                    items = response.data["data"]
-                else:
-                    self.logger.warning(f"Unexpected data structure at page {page}.")
-                    break
+    async def apaginate(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        payload: Optional[Dict[str, Any]] = None,
+        max_pages: int = 5,
+        prefetch: int = 1,
+        buffer_size: int = PAGE_BUFFER_SIZE,
+        start_page: int = 1,
+        lane: str = TICKETS_LANE
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Streaming version of `paginate`: yields each page's items as soon as the page arrives.
 
-                if not items:
-                    self.logger.info(f"No items on page {page}, stopping pagination.")
-                    break
+        Pages are fetched by a background task into a queue of at most `buffer_size` pages, so a
+        slow consumer stops further fetching instead of letting pages pile up in memory.
+        Leaving the `async for` early cancels the outstanding fetches.
+        """
+        if payload is None:
+            payload = {}
 
-                all_data.extend(items)
-                page += 1
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(buffer_size, 1))
+        end_of_pages = object()
 
+        async def produce():
+            try:
+                async for items in self._iter_pages(session, endpoint, payload, max_pages, prefetch, start_page, lane):
+                    await queue.put(items)
+                await queue.put(end_of_pages)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                self.logger.info(f"Error during pagination at page {page}: {e}")
-                break
+                await queue.put(e)
 
-        return all_data
\ No newline at end of file
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                items = await queue.get()
+                if items is end_of_pages:
+                    break
+                if isinstance(items, Exception):
+                    raise items
+                yield items
+        finally:
+            producer.cancel()
@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+# (column, key in the message group) for fields shared by every message of a group
+GROUP_FIELDS = [
+    ("id", "id"),
+    ("parent_id", "parent_id"),
+    ("userid", "userid"),
+    ("user_full_name", "user_full_name"),
+    ("type", "type"),
+    ("status", "status"),
+    ("datecreated", "datecreated"),
+    ("datefinished", "datefinished"),
+    ("sort_order", "sort_order"),
+    ("mail_msg_id", "mail_msg_id"),
+    ("pop3_msg_id", "pop3_msg_id"),
+]
+
+# (column, key in the group's `messages` items)
+MESSAGE_FIELDS = [
+    ("message_id", "id"),
+    ("message_userid", "userid"),
+    ("message_type", "type"),
+    ("message_datecreated", "datecreated"),
+    ("message_format", "format"),
+    ("message", "message"),
+    ("message_visibility", "visibility"),
+]
+
+# Fields of the ticket the messages belong to
+TICKET_COLUMNS = ["ticket_id", "owner_name", "agentid"]
+
+# Low-cardinality columns whose values are shared (interned) across the whole buffer: user ids and
+# names, codes, and the empty strings LiveAgent sends for unset fields
+INTERNED_COLUMNS = {
+    "owner_name",
+    "agentid",
+    "parent_id",
+    "userid",
+    "user_full_name",
+    "type",
+    "status",
+    "mail_msg_id",
+    "pop3_msg_id",
+    "message_userid",
+    "message_type",
+    "message_format",
+    "message_visibility",
+}
+
+MESSAGE_COLUMNS = [
+    *TICKET_COLUMNS,
+    "agent_name",
+    *(column for column, _ in GROUP_FIELDS),
+    *(column for column, _ in MESSAGE_FIELDS),
+]
+
+class TicketMetadata(NamedTuple):
+    """The ticket fields every flattened message carries, kept once per ticket."""
+    ticket_id: str
+    owner_name: Optional[str]
+    agentid: Optional[str]
+
+class MessageColumns:
+    """
+    Column buffers for flattened ticket messages: one row per message, or one row per message group
+    that has none.
+
+    Message fields are appended straight into per-column lists; ticket and group fields are stored
+    once per ticket/group with a repeat count and expanded with `np.repeat` in `to_frame`, so no
+    per-row dict (or per-row copy of the group fields) is ever built.
+
+    With `intern_strings`, values of `INTERNED_COLUMNS` go through a pool owned by the buffer, so every
+    row holding the same user id, name or code points at one string object instead of the fresh copy
+    each decoded JSON page carries. The pool is released with the buffer.
+    """
+    def __init__(self, intern_strings: bool = True):
+        self.strings: Optional[Dict[str, str]] = {} if intern_strings else None
+        self.ticket_columns: Dict[str, List[Any]] = {column: [] for column in TICKET_COLUMNS}
+        self.group_columns: Dict[str, List[Any]] = {column: [] for column, _ in GROUP_FIELDS}
+        self.message_columns: Dict[str, List[Any]] = {column: [] for column, _ in MESSAGE_FIELDS}
+        self.ticket_counts: List[int] = []
+        self.group_counts: List[int] = []
+
+        # (append, key) pairs, split so the hot loops never branch on whether a column is interned
+        self._group_appends, self._interned_group_appends = self._appends(self.group_columns, GROUP_FIELDS)
+        self._message_appends, self._interned_message_appends = self._appends(self.message_columns, MESSAGE_FIELDS)
+
+    def _appends(self, columns: Dict[str, List[Any]], fields: List[Tuple[str, str]]) -> Tuple[List, List]:
+        plain, interned = [], []
+        for column, key in fields:
+            is_interned = self.strings is not None and column in INTERNED_COLUMNS
+            (interned if is_interned else plain).append((columns[column].append, key))
+        return plain, interned
+
+    def intern(self, value: Any) -> Any:
+        if self.strings is None or not isinstance(value, str):
+            return value
+        return self.strings.setdefault(value, value)
+
+    def append_ticket(
+        self,
+        ticket_id: str,
+        owner_name: Optional[str],
+        agentid: Optional[str],
+        message_groups: List[Dict[str, Any]]
+    ):
+        # Interned columns only hold scalars (strings or None), so every value can key the pool
+        intern = self.strings.setdefault if self.strings is not None else None
+        ticket_rows = 0
+        for group in message_groups:
+            for append, key in self._group_appends:
+                append(group.get(key))
+            for append, key in self._interned_group_appends:
+                value = group.get(key)
+                append(intern(value, value))
+
+            messages = group.get("messages")
+            if messages:
+                for message in messages:
+                    for append, key in self._message_appends:
+                        append(message.get(key))
+                    for append, key in self._interned_message_appends:
+                        value = message.get(key)
+                        append(intern(value, value))
+            else:
+                messages = [None]
+                for append, _ in self._message_appends + self._interned_message_appends:
+                    append(None)
+
+            self.group_counts.append(len(messages))
+            ticket_rows += len(messages)
+
+        if ticket_rows:
+            self.ticket_columns["ticket_id"].append(ticket_id)
+            self.ticket_columns["owner_name"].append(self.intern(owner_name))
+            self.ticket_columns["agentid"].append(self.intern(agentid))
+            self.ticket_counts.append(ticket_rows)
+
+    def __len__(self) -> int:
+        return len(self.message_columns["message_id"])
+
+    def _repeat(self, values: List[Any], counts: List[int]) -> np.ndarray:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return np.repeat(array, counts)
+
+    def to_frame(self) -> pd.DataFrame:
+        columns = {
+            **{column: self._repeat(values, self.ticket_counts) for column, values in self.ticket_columns.items()},
+            "agent_name": np.full(len(self), "", dtype=object),
+            **{column: self._repeat(values, self.group_counts) for column, values in self.group_columns.items()},
+            **self.message_columns
+        }
+        # Repeated values come out as object arrays; infer dtypes as the row-dict frames did
+        return pd.DataFrame(columns, columns=MESSAGE_COLUMNS).infer_objects()
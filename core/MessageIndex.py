@@ -0,0 +1,83 @@
+from config.constants import PROJECT_ID, DATASET_NAME
+from core.BigQueryManager import BigQuery
+from typing import Iterable, List, Set
+import pandas as pd
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+def message_keys(df: pd.DataFrame) -> List[int]:
+    """
+    One key per row: the hash of `(id, message_id)`, i.e. the message group and the message in it
+    (`message_id` is empty for a group without messages). Hashes keep the index at one int per
+    message instead of two strings; a collision would need billions of messages in one run.
+    """
+    group_ids = df["id"].astype("string").fillna("").tolist()
+    message_ids = df["message_id"].astype("string").fillna("").tolist()
+    return [hash(key) for key in zip(group_ids, message_ids)]
+
+class MessageIndex:
+    """
+    Messages already stored in the `messages` table, so a run only appends new ones.
+
+    The 6-hour windows overlap and changed tickets are re-fetched from their last known page, so the
+    same message comes back on many runs. `load` reads the keys stored for the run's tickets (once per
+    run: each query scans the table's key columns); `new_messages` drops those rows, and rows already
+    kept earlier in this run, from a fetched batch before any user lookups are spent on it.
+    """
+    def __init__(self, bigquery: BigQuery, table_name: str = "messages"):
+        self.bigquery = bigquery
+        self.table_name = table_name
+        self.known: Set[int] = set()
+        self.loaded_tickets: Set[str] = set()
+
+        self.rows_seen = 0
+        self.rows_dropped = 0
+
+    def load(self, ticket_ids: Iterable[str]):
+        """
+        Add the stored keys of `ticket_ids` to the index.
+        On any error (e.g. the table does not exist yet) nothing is added, so every message is kept.
+        """
+        ticket_ids = [ticket_id for ticket_id in set(ticket_ids) if ticket_id and ticket_id not in self.loaded_tickets]
+        if not ticket_ids:
+            return
+
+        try:
+            query = f"""
+            SELECT DISTINCT id, message_id
+            FROM `{PROJECT_ID}.{DATASET_NAME}.{self.table_name}`
+            WHERE ticket_id IN UNNEST(@ids)
+            """
+            df = self.bigquery.query_ids(query, ticket_ids)
+            self.known.update(message_keys(df))
+            self.loaded_tickets.update(ticket_ids)
+            logging.info(f"Loaded {len(df)} stored message keys for {len(ticket_ids)} tickets.")
+        except Exception as e:
+            logging.warning(f"Could not load stored message keys, keeping all messages: {e}")
+
+    def new_messages(self, messages: pd.DataFrame) -> pd.DataFrame:
+        if messages.empty:
+            return messages
+
+        keep = []
+        for key in message_keys(messages):
+            is_new = key not in self.known
+            if is_new:
+                self.known.add(key)
+            keep.append(is_new)
+
+        self.rows_seen += len(keep)
+        dropped = len(keep) - sum(keep)
+        self.rows_dropped += dropped
+        if dropped:
+            logging.info(f"Dropped {dropped} of {len(keep)} messages already stored.")
+            return messages[keep].reset_index(drop=True)
+        return messages
+
+    def clear(self):
+        self.known.clear()
+        self.loaded_tickets.clear()
@@ -0,0 +1,254 @@
+from config.config import RATE_LIMIT_BACKEND, RATE_LIMIT_REDIS_URL, RATE_LIMIT_SQLITE_PATH
+from typing import Dict, Tuple, Any
+import sqlite3
+import asyncio
+import logging
+import time
+import os
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class RateLimitBackend:
+    """
+    Storage for `TokenBucket` state. Every backend implements the same two operations atomically:
+
+    - `take`: refill the bucket for the time elapsed, then take `tokens` if they are there. Returns 0
+      when they were taken, otherwise the seconds to wait before trying again.
+    - `pause`: empty the bucket and hand out nothing for `seconds` (e.g. after a 429).
+
+    Shared backends (Redis, SQLite) let every process and instance draw from one bucket per `key`.
+    """
+    name = "base"
+
+    async def take(self, key: str, tokens: int, rate_per_second: float, burst: int) -> float:
+        raise NotImplementedError
+
+    async def pause(self, key: str, seconds: float):
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+def _take_tokens(
+    tokens_available: float,
+    updated_at: float,
+    paused_until: float,
+    now: float,
+    tokens: int,
+    rate_per_second: float,
+    burst: int
+) -> Tuple[float, float, float]:
+    """Shared bucket arithmetic: returns `(wait_seconds, tokens_left, updated_at)`."""
+    if paused_until > now:
+        return paused_until - now, tokens_available, updated_at
+
+    if now > updated_at:
+        tokens_available = min(burst, tokens_available + (now - updated_at) * rate_per_second)
+        updated_at = now
+
+    if tokens_available >= tokens:
+        return 0.0, tokens_available - tokens, updated_at
+    return (tokens - tokens_available) / rate_per_second, tokens_available, updated_at
+
+class MemoryBackend(RateLimitBackend):
+    """Per-process bucket (the default). Does not coordinate across instances."""
+    name = "memory"
+
+    def __init__(self):
+        # key -> [tokens, updated_at, paused_until]; a missing key is a full bucket
+        self.buckets: Dict[str, list] = {}
+
+    async def take(self, key: str, tokens: int, rate_per_second: float, burst: int) -> float:
+        now = time.monotonic()
+        state = self.buckets.setdefault(key, [float(burst), now, 0.0])
+        wait, state[0], state[1] = _take_tokens(state[0], state[1], state[2], now, tokens, rate_per_second, burst)
+        return wait
+
+    async def pause(self, key: str, seconds: float):
+        now = time.monotonic()
+        state = self.buckets.setdefault(key, [0.0, now, 0.0])
+        state[2] = max(state[2], now + seconds)
+        state[0] = 0.0
+        state[1] = max(state[1], state[2])
+
+    def describe(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "backend": self.name,
+            "buckets": {
+                key: {
+                    "tokens": round(max(tokens, 0.0), 2),
+                    "paused_for_seconds": round(max(0.0, paused_until - now), 3)
+                }
+                for key, (tokens, _, paused_until) in self.buckets.items()
+            }
+        }
+
+class SQLiteBackend(RateLimitBackend):
+    """
+    Bucket in a SQLite file, shared by every process on the same host (local runs, an overlapping backfill).
+    Each operation is one `BEGIN IMMEDIATE` transaction, run in a worker thread.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "key TEXT PRIMARY KEY, tokens REAL, updated_at REAL, paused_until REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def _take(self, key: str, tokens: int, rate_per_second: float, burst: int) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT tokens, updated_at, paused_until FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            tokens_available, updated_at, paused_until = row if row else (float(burst), now, 0.0)
+            wait, tokens_available, updated_at = _take_tokens(
+                tokens_available, updated_at, paused_until, now, tokens, rate_per_second, burst
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at, paused_until) VALUES (?, ?, ?, ?)",
+                (key, tokens_available, updated_at, paused_until)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _pause(self, key: str, seconds: float):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                "SELECT updated_at, paused_until FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            updated_at, paused_until = row if row else (now, 0.0)
+            paused_until = max(paused_until, now + seconds)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, tokens, updated_at, paused_until) VALUES (?, 0, ?, ?)",
+                (key, max(updated_at, paused_until), paused_until)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    async def take(self, key: str, tokens: int, rate_per_second: float, burst: int) -> float:
+        return await asyncio.to_thread(self._take, key, tokens, rate_per_second, burst)
+
+    async def pause(self, key: str, seconds: float):
+        await asyncio.to_thread(self._pause, key, seconds)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.name, "path": self.path}
+
+class RedisBackend(RateLimitBackend):
+    """
+    Bucket in Redis (or any store that runs Redis Lua scripts), shared by every instance.
+    Refill and take happen in one script using the server clock, so instance clock skew does not matter.
+    """
+    name = "redis"
+
+    TAKE_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local requested = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at', 'paused_until')
+    local tokens = tonumber(state[1]) or burst
+    local updated_at = tonumber(state[2]) or now
+    local paused_until = tonumber(state[3]) or 0
+
+    if paused_until > now then
+        return tostring(paused_until - now)
+    end
+    if now > updated_at then
+        tokens = math.min(burst, tokens + (now - updated_at) * rate)
+        updated_at = now
+    end
+
+    local wait = 0
+    if tokens >= requested then
+        tokens = tokens - requested
+    else
+        wait = (requested - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(updated_at))
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+    return tostring(wait)
+    """
+
+    PAUSE_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local paused_until = math.max(tonumber(redis.call('HGET', KEYS[1], 'paused_until')) or 0, now + tonumber(ARGV[1]))
+    local updated_at = math.max(tonumber(redis.call('HGET', KEYS[1], 'updated_at')) or now, paused_until)
+    redis.call('HSET', KEYS[1], 'tokens', '0', 'updated_at', tostring(updated_at), 'paused_until', tostring(paused_until))
+    redis.call('EXPIRE', KEYS[1], math.ceil(paused_until - now) + 60)
+    return tostring(paused_until - now)
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        if aioredis is None:
+            raise ImportError("The redis rate-limit backend requires the `redis` package.")
+        if not url:
+            raise ValueError("RATE_LIMIT_REDIS_URL must be set for the redis rate-limit backend.")
+
+        self.url = url
+        self.client = aioredis.from_url(url)
+        self.take_script = self.client.register_script(self.TAKE_SCRIPT)
+        self.pause_script = self.client.register_script(self.PAUSE_SCRIPT)
+
+    async def take(self, key: str, tokens: int, rate_per_second: float, burst: int) -> float:
+        wait = await self.take_script(keys=[key], args=[rate_per_second, burst, tokens])
+        return float(wait)
+
+    async def pause(self, key: str, seconds: float):
+        await self.pause_script(keys=[key], args=[seconds])
+
+    def describe(self) -> Dict[str, Any]:
+        # Only the host part, never credentials
+        return {"backend": self.name, "url": self.url.rsplit("@", 1)[-1]}
+
+def create_rate_limit_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    """
+    Backend selected by `RATE_LIMIT_BACKEND` ("memory", "sqlite" or "redis").
+    If a shared backend cannot be created the per-process one is used, so a misconfiguration slows
+    coordination down rather than stopping the pipeline.
+    """
+    try:
+        if name == "redis":
+            return RedisBackend()
+        if name == "sqlite":
+            return SQLiteBackend()
+        if name != "memory":
+            raise ValueError(f"Unknown rate-limit backend: {name}")
+    except Exception as e:
+        logging.error(f"Could not create the {name} rate-limit backend, falling back to memory: {e}")
+    return MemoryBackend()
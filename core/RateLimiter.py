@@ -0,0 +1,102 @@
+from core.RateLimitBackends import RateLimitBackend, MemoryBackend, create_rate_limit_backend
+from config.constants import RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_KEY
+from typing import Dict, Any
+import asyncio
+import logging
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+
+    Holds up to `burst` tokens and refills at `rate_per_minute / 60` tokens per second.
+    Each request takes one token; callers wait (in FIFO order) when the bucket is empty.
+    This only limits the request *rate*; the number of in-flight requests is capped separately.
+
+    The bucket itself lives in `backend`: per process by default, or in SQLite/Redis so every
+    instance sharing the LiveAgent account draws from the same bucket (`key`).
+    """
+    def __init__(
+        self,
+        rate_per_minute: float = RATE_LIMIT_PER_MINUTE,
+        burst: int = RATE_LIMIT_BURST,
+        backend: RateLimitBackend = None,
+        key: str = RATE_LIMIT_KEY
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.backend = backend or create_rate_limit_backend()
+        self.key = key
+        # Used only while a shared backend is unreachable, so throttling degrades to per-process instead of failing
+        self.fallback = MemoryBackend()
+        self.lock = asyncio.Lock()
+
+        self.total_acquired = 0
+        self.total_wait_seconds = 0.0
+        self.total_pauses = 0
+
+    @property
+    def refill_rate(self) -> float:
+        """Tokens added per second."""
+        return self.rate_per_minute / 60
+
+    async def acquire(self, tokens: int = 1):
+        """Wait until `tokens` are available, then take them."""
+        if tokens > self.burst:
+            raise ValueError(f"Cannot acquire {tokens} tokens from a bucket of size {self.burst}.")
+
+        started_at = time.monotonic()
+        async with self.lock:
+            while True:
+                try:
+                    wait = await self.backend.take(self.key, tokens, self.refill_rate, self.burst)
+                except Exception as e:
+                    logging.error(f"{self.backend.name} rate limiter unavailable, throttling locally: {e}")
+                    wait = await self.fallback.take(self.key, tokens, self.refill_rate, self.burst)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+        self.total_acquired += tokens
+        self.total_wait_seconds += time.monotonic() - started_at
+
+    async def pause(self, seconds: float):
+        """
+        Stop handing out tokens for `seconds` and empty the bucket, e.g. after the API answers 429.
+        Overlapping pauses extend to the latest deadline rather than stacking; with a shared backend
+        the pause applies to every instance.
+        """
+        if seconds <= 0:
+            return
+
+        self.total_pauses += 1
+        logging.warning(f"Rate limiter paused for {seconds:.2f}s")
+        await self.fallback.pause(self.key, seconds)
+        try:
+            await self.backend.pause(self.key, seconds)
+        except Exception as e:
+            logging.error(f"Could not pause the {self.backend.name} rate limiter: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": self.rate_per_minute,
+            "burst": self.burst,
+            "key": self.key,
+            **self.backend.describe(),
+            "total_acquired": self.total_acquired,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "total_pauses": self.total_pauses
+        }
+
+# Shared across every `LiveAgentClient` in the process, since the quota is per LiveAgent account
+liveagent_rate_limiter = TokenBucket()
@@ -0,0 +1,146 @@
+from config.constants import MAX_CONCURRENT_REQUESTS, REQUEST_LANE_SHARES
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Any
+from collections import deque
+import asyncio
+import logging
+import math
+import time
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class Lane:
+    """Waiters and counters of one scheduler lane."""
+    def __init__(self, name: str, priority: int, limit: int):
+        self.name = name
+        self.priority = priority
+        self.limit = limit
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+        self.total_acquired = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "total_acquired": self.total_acquired,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.total_acquired, 4) if self.total_acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4)
+        }
+
+class RequestScheduler:
+    """
+    Single in-flight limit for `LiveAgentClient`, split into priority lanes.
+
+    `lanes` maps lane names, highest priority first, to the share of `max_concurrent` slots the lane
+    may hold at once. A freed slot always goes to the highest-priority lane that has a waiter and is
+    under its limit, so lower lanes never hold the slots reserved for the critical path
+    (e.g. with 15 slots and a 0.8 share, message pages leave 3 slots for ticket listing).
+    """
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        lanes: Dict[str, float] = None
+    ):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1.")
+
+        self.shares = lanes or REQUEST_LANE_SHARES
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.lanes: Dict[str, Lane] = {
+            name: Lane(name, priority, self._lane_limit(share))
+            for priority, (name, share) in enumerate(self.shares.items())
+        }
+
+    def _lane_limit(self, share: float) -> int:
+        return max(1, min(self.max_concurrent, math.ceil(share * self.max_concurrent)))
+
+    def resize(self, max_concurrent: int):
+        """
+        Change the in-flight limit (e.g. from the AIMD controller). Lane limits keep their shares.
+        When shrinking, requests already in flight finish; new ones wait until the total is under the limit.
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        for name, lane in self.lanes.items():
+            lane.limit = self._lane_limit(self.shares[name])
+        self._dispatch()
+
+    def _lane(self, name: str) -> Lane:
+        lane = self.lanes.get(name)
+        if lane is None:
+            raise ValueError(f"Unknown request lane: {name}. Expected one of {list(self.lanes)}.")
+        return lane
+
+    def _dispatch(self):
+        """Hand free slots to waiters, highest-priority lane first."""
+        while self.active < self.max_concurrent:
+            for lane in self.lanes.values():
+                while lane.waiters and lane.waiters[0].done():
+                    lane.waiters.popleft()
+                if lane.waiters and lane.active < lane.limit:
+                    waiter = lane.waiters.popleft()
+                    lane.active += 1
+                    self.active += 1
+                    waiter.set_result(None)
+                    break
+            else:
+                return
+
+    async def acquire(self, lane_name: str):
+        lane = self._lane(lane_name)
+        started_at = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the caller was cancelled, pass it on
+                self.release(lane_name)
+            else:
+                try:
+                    lane.waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+        waited = time.monotonic() - started_at
+        lane.total_acquired += 1
+        lane.total_wait_seconds += waited
+        lane.max_wait_seconds = max(lane.max_wait_seconds, waited)
+
+    def release(self, lane_name: str):
+        lane = self._lane(lane_name)
+        lane.active -= 1
+        self.active -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, lane_name: str) -> AsyncIterator[None]:
+        await self.acquire(lane_name)
+        try:
+            yield
+        finally:
+            self.release(lane_name)
+
+    def queue_depth(self) -> int:
+        return sum(len(lane.waiters) for lane in self.lanes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queued": self.queue_depth(),
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()}
+        }
@@ -0,0 +1,72 @@
+from config.constants import LIVEAGENT_MGO_SYSTEM_USER_ID, LIVEAGENT_MGO_SPECIAL_USER_ID
+from typing import Dict, Tuple, Any
+import pandas as pd
+import numpy as np
+
+UNKNOWN_AGENT = "Unknown Agent"
+
+class _Lookup:
+    """
+    A column factorized once: rules are evaluated per distinct value (user and agent ids repeat
+    across thousands of messages) and spread back over the rows with one take.
+    """
+    def __init__(self, values: pd.Series):
+        self.codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        # Missing values (code -1) are looked up as `None`, placed last so `take` picks it
+        self.uniques = [*uniques, None]
+
+    def take(self, per_value) -> np.ndarray:
+        results = np.empty(len(self.uniques), dtype=object)
+        results[:] = [per_value(value) for value in self.uniques]
+        return results[self.codes]
+
+def resolve_sender_receiver(messages: pd.DataFrame, agent_cache: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Sender/receiver columns for every message at once.
+
+    The message `userid` and the ticket `agentid` are factorized and joined against the agent lookup
+    (`agent_cache`) once per distinct id:
+
+    1. `system00` (System, sends HTML text) and `00054iwg` (MechaniGo.ph, sends automated text): system -> client
+    2. an agent: agent -> client
+    3. anyone else: client -> the ticket's agent
+
+    Only the client case depends on the row (the ticket owner's name), which `np.where` fills in.
+    Returns `sender_name`, `sender_type`, `receiver_name`, `receiver_type` and `agent_name`
+    aligned with `messages`.
+    """
+    def sender(userid: str) -> Tuple[str, str]:
+        if userid == LIVEAGENT_MGO_SYSTEM_USER_ID:
+            return "System", "system"
+        if userid == LIVEAGENT_MGO_SPECIAL_USER_ID:
+            return "MechaniGo.ph", "system"
+        if userid in agent_cache:
+            return agent_cache[userid].get("name", UNKNOWN_AGENT), "agent"
+        return None, "client"
+
+    def receiver_agent_name(agentid: str) -> str:
+        agent_info = agent_cache.get(agentid)
+        if not agent_info:
+            return UNKNOWN_AGENT
+        if agent_info["id"] == LIVEAGENT_MGO_SPECIAL_USER_ID:
+            return "MechaniGo.ph"
+        return agent_info.get("name", UNKNOWN_AGENT)
+
+    def ticket_agent_name(agentid: str) -> str:
+        agent_info = agent_cache.get(agentid)
+        return agent_info["name"] if agent_info else UNKNOWN_AGENT
+
+    users = _Lookup(messages["userid"])
+    agents = _Lookup(messages["agentid"])
+    owner_name = messages["owner_name"].to_numpy(dtype=object, na_value=None)
+
+    sender_type = users.take(lambda userid: sender(userid)[1])
+    from_client = sender_type == "client"
+
+    return pd.DataFrame({
+        "sender_name": np.where(from_client, owner_name, users.take(lambda userid: sender(userid)[0])),
+        "sender_type": sender_type,
+        "receiver_name": np.where(from_client, agents.take(receiver_agent_name), owner_name),
+        "receiver_type": users.take(lambda userid: "agent" if sender(userid)[1] == "client" else "client"),
+        "agent_name": agents.take(ticket_agent_name)
+    }, index=messages.index)
@@ -1,7 +1,12 @@
 from core.TicketMessageProcessor import TicketMessageProcessor
+from config.constants import PAGE_PREFETCH_WINDOW, MIN_SPLIT_WINDOW_SECONDS, MESSAGES_LANE
+from utils.tickets_util import set_filter, split_window
+from core.schemas.TicketFilter import FilterField
+from core.TicketSyncState import TicketSyncState
+from core.MessageColumns import MessageColumns, TicketMetadata
 from api.schemas.response import ExtractionResponse
 from core.LiveAgentClient import LiveAgentClient
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Any
 from core.User import User
 import pandas as pd
 import aiohttp
@@ -22,6 +27,12 @@ class Ticket:
         self.endpoint = "tickets"
 
         self.ticket_metadata_cache = {}
+        self.ticket_activity_cache = {}
+        self.message_sync_cache = {}
+        # Planned windows that may be missing tickets: still over the page cap at the smallest split, or never probed
+        self.incomplete_windows: Set[Tuple[pd.Timestamp, pd.Timestamp]] = set()
+        # Tickets whose messages were not requested because the messages circuit was open
+        self.skipped_tickets: Set[str] = set()
 
     def _default_payload(self) -> Dict[str, Any]:
         return {
@@ -31,18 +42,45 @@ class Ticket:
             "_sortDir": "ASC"
         }
 
-    def get_ticket_metadata_cache(self) -> Dict[str, Dict]:
+    def get_ticket_metadata_cache(self) -> Dict[str, TicketMetadata]:
         return self.ticket_metadata_cache
 
     def get_user_cache(self) -> Dict[str, Dict[str, Any]]:
         return self.message_processor.get_user_cache()
 
+    def _tickets_to_dataframe(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
+        for ticket in data:
+            ticket['owner_name'] = ticket.get('owner_name', None)
+            ticket['agentid'] = ticket.get('agentid', None)
+            ticket['tags'] = ','.join(ticket['tags']) if ticket.get('tags') else ''
+            ticket['date_due'] = ticket.get('date_due')
+            ticket['date_deleted'] = ticket.get('date_deleted')
+            ticket['date_resolved'] = ticket.get('date_resolved')
+
+            if ticket.get("owner_contactid"):
+                self.message_processor.add_ticket_owner(
+                    ticket["owner_contactid"], ticket.get("owner_name"), ticket.get("owner_email")
+                )
+
+            ticket_id = ticket.get("id", None)
+            if ticket_id:
+                self.ticket_metadata_cache[ticket_id] = TicketMetadata(
+                    ticket_id, ticket.get("owner_name", None), ticket.get("agentid", None)
+                )
+                self.ticket_activity_cache[ticket_id] = {
+                    "last_activity": ticket.get("last_activity"),
+                    "last_activity_public": ticket.get("last_activity_public")
+                }
+
+        return pd.DataFrame(data)
+
     async def fetch_tickets(
         self,
         session: aiohttp.ClientSession,
         payload: Dict[str, Any] = None,
         max_pages: int = 5,
-        per_page: int = 10
+        per_page: int = 10,
+        prefetch: int = PAGE_PREFETCH_WINDOW
     ) -> ExtractionResponse:
         if payload is None:
             payload = self._default_payload()
@@ -51,26 +89,154 @@ class Ticket:
             session,
             self.endpoint,
             payload,
-            max_pages
+            max_pages,
+            prefetch=prefetch
         )
 
-        for ticket in data:
-            ticket['owner_name'] = ticket.get('owner_name', None)
-            ticket['agentid'] = ticket.get('agentid', None)
-            ticket['tags'] = ','.join(ticket['tags']) if ticket.get('tags') else ''
-            ticket['date_due'] = ticket.get('date_due')
-            ticket['date_deleted'] = ticket.get('date_deleted')
-            ticket['date_resolved'] = ticket.get('date_resolved')
+        return self._tickets_to_dataframe(data)
 
-            ticket_id = ticket.get("id", None)
-            if ticket_id:
-                self.ticket_metadata_cache[ticket_id] = {
-                    "ticket_id": ticket_id,
-                    "owner_name": ticket.get("owner_name", None),
-                    "agentid": ticket.get("agentid", None)
-                }
+    async def _window_exceeds_cap(
+        self,
+        session: aiohttp.ClientSession,
+        payload: Dict[str, Any],
+        max_pages: int,
+        per_page: int
+    ) -> Optional[bool]:
+        """
+        Probe only the last allowed page: if it is full, fetching the window would be truncated.
+        Returns `None` when the probe failed and the window size is unknown.
+        """
+        response = await self.client.make_request(
+            session=session,
+            endpoint=self.endpoint,
+            params={**payload, "_perPage": per_page, "_page": max_pages}
+        )
+        if not response.success:
+            logging.warning(f"Could not probe the size of window {payload.get('_filters')}: {response.error}")
+            return None
 
-        return pd.DataFrame(data)
+        items = response.data
+        if isinstance(items, dict):
+            items = items.get("data", [])
+        return isinstance(items, list) and len(items) >= per_page
+
+    async def plan_windows(
+        self,
+        session: aiohttp.ClientSession,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        filter_field: FilterField,
+        payload: Dict[str, Any],
+        max_pages: int,
+        per_page: int
+    ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Split `(start, end]` until no sub-window holds more than `max_pages * per_page` tickets.
+
+        Each window costs one probe request for its last page; windows that would be truncated are
+        split (month -> weeks -> days -> hours -> ...) and their sub-windows are planned concurrently.
+        Returns the windows in chronological order. Windows that may still be truncated (probe failed,
+        or over the cap at `MIN_SPLIT_WINDOW_SECONDS`) are added to `incomplete_windows`.
+        """
+        window_payload = {**payload, "_filters": set_filter(start, filter_field, end)}
+        exceeds_cap = await self._window_exceeds_cap(session, window_payload, max_pages, per_page)
+        if exceeds_cap is None:
+            # Not split: a failing probe would most likely fail for every sub-window as well
+            logging.warning(f"Window ({start}, {end}] could not be probed; it is fetched as is and marked incomplete.")
+            self.incomplete_windows.add((start, end))
+            return [(start, end)]
+        if not exceeds_cap:
+            return [(start, end)]
+
+        if end - start <= pd.Timedelta(seconds=MIN_SPLIT_WINDOW_SECONDS):
+            logging.warning(
+                f"Window ({start}, {end}] holds more than {max_pages * per_page} tickets and cannot be split further; "
+                "results will be truncated."
+            )
+            self.incomplete_windows.add((start, end))
+            return [(start, end)]
+
+        sub_windows = split_window(start, end)
+        logging.info(f"Window ({start}, {end}] exceeds the page cap, splitting into {len(sub_windows)} sub-windows")
+        planned = await asyncio.gather(*[
+            self.plan_windows(session, sub_start, sub_end, filter_field, payload, max_pages, per_page)
+            for sub_start, sub_end in sub_windows
+        ])
+        return [window for windows in planned for window in windows]
+
+    async def stream_tickets(
+        self,
+        session: aiohttp.ClientSession,
+        payload: Dict[str, Any] = None,
+        max_pages: int = 5,
+        per_page: int = 10,
+        prefetch: int = PAGE_PREFETCH_WINDOW
+    ) -> AsyncIterator[pd.DataFrame]:
+        """Streaming version of `fetch_tickets`: yields one DataFrame per page of tickets."""
+        if payload is None:
+            payload = self._default_payload()
+        payload["_perPage"] = per_page
+        async for data in self.client.apaginate(
+            session,
+            self.endpoint,
+            payload,
+            max_pages,
+            prefetch=prefetch
+        ):
+            yield self._tickets_to_dataframe(data)
+
+    def _sort_order(self, message: Dict[str, Any]) -> int:
+        try:
+            return int(message.get("sort_order"))
+        except (TypeError, ValueError):
+            return None
+
+    def _plan_message_sync(
+        self,
+        ticket_ids: List[str],
+        ticket_agentids: List[str],
+        ticket_owner_names: List[str],
+        sync_state: Dict[str, Dict[str, Any]],
+        per_page: int
+    ) -> Tuple[List[str], List[str], List[str], Dict[str, Dict[str, int]]]:
+        """
+        Drop tickets whose `last_activity`/`last_activity_public` match the last sync, and work out where
+        the others can resume. The page holding the last known group is re-read, since that group may have grown.
+        """
+        kept_ids, kept_agentids, kept_owner_names = [], [], []
+        resume_from = {}
+        for i, ticket_id in enumerate(ticket_ids):
+            state = sync_state.get(ticket_id)
+            activity = self.ticket_activity_cache.get(ticket_id)
+            if state and activity:
+                if TicketSyncState.is_unchanged(state, activity):
+                    continue
+
+                message_count = state.get("message_count")
+                last_sort_order = state.get("last_sort_order")
+                if pd.notna(message_count) and pd.notna(last_sort_order) and message_count > 0:
+                    resume_from[ticket_id] = {
+                        "start_page": (int(message_count) - 1) // per_page + 1,
+                        "after_sort_order": int(last_sort_order)
+                    }
+
+            kept_ids.append(ticket_id)
+            kept_agentids.append(ticket_agentids[i] if ticket_agentids else None)
+            kept_owner_names.append(ticket_owner_names[i] if ticket_owner_names else None)
+
+        logging.info(
+            f"Skipping {len(ticket_ids) - len(kept_ids)} unchanged tickets; "
+            f"{len(resume_from)} of the remaining {len(kept_ids)} resume from their last known message."
+        )
+        return kept_ids, kept_agentids, kept_owner_names, resume_from
+
+    def sync_state_updates(self) -> List[Dict[str, Any]]:
+        """Sync state rows for the tickets whose messages were fully fetched in this run."""
+        return [
+            {"ticket_id": ticket_id, **self.ticket_activity_cache[ticket_id], **sync}
+            for ticket_id, sync in self.message_sync_cache.items()
+            if ticket_id in self.ticket_activity_cache
+        ]
 
     async def fetch_ticket_message(
         self,
@@ -79,32 +245,105 @@ class Ticket:
         ticket_owner_name: str,
         max_page: int,
         per_page: int,
-        session: aiohttp.ClientSession
+        session: aiohttp.ClientSession,
+        start_page: int = 1,
+        after_sort_order: int = None
     ) -> ExtractionResponse:
+        """
+        With `start_page`/`after_sort_order` (from `_plan_message_sync`), only the pages from the last known
+        message group onwards are fetched, and groups older than `after_sort_order` are dropped.
+        """
         message_payload = {
-            "_page": 1,
+            "_page": start_page,
             "_perPage": per_page
         }
+        endpoint = f"{self.endpoint}/{ticket_id}/messages"
 
         messages_data = await self.client.paginate(
             session,
-            endpoint=f"{self.endpoint}/{ticket_id}/messages",
+            endpoint=endpoint,
             payload=message_payload,
-            max_pages=max_page
+            max_pages=max_page,
+            start_page=start_page,
+            lane=MESSAGES_LANE
         )
-
-        ticket_metadata = self.ticket_metadata_cache.get(
-            ticket_id, {
-                "ticket_id": ticket_id,
-                "agentid": ticket_agent_id,
-                "owner_name": ticket_owner_name
-            }
+        self._record_message_sync(
+            ticket_id, endpoint, max_page, per_page, start_page, len(messages_data),
+            self._last_sort_order(messages_data, after_sort_order)
         )
 
-        for message in messages_data:
-            message.update(ticket_metadata)
+        # The ticket fields are not copied into every message group; `MessageColumns` adds them once per ticket
+        return self._groups_after(messages_data, after_sort_order)
 
-        return messages_data
+    async def stream_ticket_message(
+        self,
+        ticket_id: str,
+        ticket_agent_id: str,
+        ticket_owner_name: str,
+        max_page: int,
+        per_page: int,
+        session: aiohttp.ClientSession,
+        start_page: int = 1,
+        after_sort_order: int = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Streaming version of `fetch_ticket_message`: yields one page of message groups at a time, ready for
+        `MessageColumns.append_ticket`. The sync state is only recorded once every page has been consumed.
+        """
+        message_payload = {
+            "_page": start_page,
+            "_perPage": per_page
+        }
+        endpoint = f"{self.endpoint}/{ticket_id}/messages"
+
+        fetched = 0
+        last_sort_order = after_sort_order
+        async for messages_data in self.client.apaginate(
+            session,
+            endpoint=endpoint,
+            payload=message_payload,
+            max_pages=max_page,
+            start_page=start_page,
+            lane=MESSAGES_LANE
+        ):
+            fetched += len(messages_data)
+            last_sort_order = self._last_sort_order(messages_data, last_sort_order)
+            page = self._groups_after(messages_data, after_sort_order)
+            if page:
+                yield page
+
+        self._record_message_sync(ticket_id, endpoint, max_page, per_page, start_page, fetched, last_sort_order)
+
+    def _last_sort_order(self, messages_data: List[Dict[str, Any]], default: int = None) -> int:
+        sort_orders = [self._sort_order(message) for message in messages_data]
+        return max((sort_order for sort_order in sort_orders if sort_order is not None), default=default)
+
+    def _groups_after(self, messages_data: List[Dict[str, Any]], after_sort_order: int = None) -> List[Dict[str, Any]]:
+        """Drop the groups already stored by an earlier run (older than `after_sort_order`)."""
+        if after_sort_order is None:
+            return messages_data
+        return [
+            message for message in messages_data
+            if self._sort_order(message) is None or self._sort_order(message) >= after_sort_order
+        ]
+
+    def _record_message_sync(
+        self,
+        ticket_id: str,
+        endpoint: str,
+        max_page: int,
+        per_page: int,
+        start_page: int,
+        fetched: int,
+        last_sort_order: int
+    ):
+        # Only a complete fetch (no failed page, page cap not reached) is safe to resume from next time
+        hit_page_cap = fetched >= (max_page - start_page + 1) * per_page
+        if endpoint not in self.client.truncated_endpoints and not hit_page_cap:
+            self.message_sync_cache[ticket_id] = {
+                "message_count": (start_page - 1) * per_page + fetched,
+                "last_sort_order": last_sort_order
+            }
 
     async def fetch_ticket_messages_batch(
         self,
@@ -114,22 +353,42 @@ class Ticket:
         max_page: int,
         per_page: int,
         session: aiohttp.ClientSession,
-        concurrent_limit: int = 10
-    ):
+        sync_state: Dict[str, Dict[str, Any]] = None
+    ) -> pd.DataFrame:
         """
-        For fetching multiple tickets concurrently.
+        For fetching multiple tickets concurrently. Returns one row per message (see `MessageColumns`).
+
+        Concurrency is bounded by the client's request scheduler (`messages` lane), so the
+        ticket listing and user lookups running at the same time keep their share of slots.
+
+        When `sync_state` (from `TicketSyncState.load`) is given, unchanged tickets are skipped
+        and changed ones resume from their last known message group.
         """
-        semaphore = asyncio.Semaphore(concurrent_limit)
+        resume_from = {}
+        if sync_state is not None:
+            ticket_ids, ticket_agentids, ticket_owner_names, resume_from = self._plan_message_sync(
+                ticket_ids, ticket_agentids, ticket_owner_names, sync_state, per_page
+            )
+
+        breaker = self.client.breakers.get(f"{self.endpoint}/:id/messages")
         async def fetch_single_ticket_messages(ticket_id: str, owner_name: str, agent_id: str):
-            async with semaphore:
-                try:
-                    logging.info(f"Fetching messages for ticket {ticket_id}")
-                    return await self.fetch_ticket_message(
-                        ticket_id, agent_id, owner_name, max_page, per_page, session
-                    )
-                except Exception as e:
-                    logging.error(f"Error fetching messages for ticket {ticket_id}: {e}")
-                    return []
+            # Fail fast instead of queueing another request behind a degraded route
+            if breaker.is_open:
+                self.skipped_tickets.add(ticket_id)
+                return []
+            try:
+                logging.info(f"Fetching messages for ticket {ticket_id}")
+                messages = await self.fetch_ticket_message(
+                    ticket_id, agent_id, owner_name, max_page, per_page, session,
+                    **resume_from.get(ticket_id, {})
+                )
+                # The circuit opened while this ticket's pages were queued: some (or all) of them were refused
+                if f"{self.endpoint}/{ticket_id}/messages" in self.client.circuit_open_endpoints:
+                    self.skipped_tickets.add(ticket_id)
+                return messages
+            except Exception as e:
+                logging.error(f"Error fetching messages for ticket {ticket_id}: {e}")
+                return []
 
         tasks = [
             fetch_single_ticket_messages(
@@ -140,50 +399,23 @@ class Ticket:
             for i, ticket_id in enumerate(ticket_ids)
         ]
         results = await asyncio.gather(*tasks, return_exceptions=True)
-        flattened_messages = []
+        flattened_messages = MessageColumns()
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 logging.error(f"Failed to fetch messages for ticket {ticket_ids[i]}: {result}")
                 continue
 
-            for message in result:
-                base_info = {
-                    "ticket_id": ticket_ids[i],
-                    "owner_name": ticket_owner_names[i] if ticket_owner_names and ticket_owner_names[i] is not None else None,
-                    "agentid": ticket_agentids[i] if ticket_agentids and ticket_agentids[i] is not None else None,
-                    "agent_name": "",
-                    "id": message.get("id"),
-                    "parent_id": message.get("parent_id"),
-                    "userid": message.get("userid"),
-                    "user_full_name": message.get("user_full_name"),
-                    "type": message.get("type"),
-                    "status": message.get("status"),
-                    "datecreated": message.get("datecreated"),
-                    "datefinished": message.get("datefinished"),
-                    "sort_order": message.get("sort_order"),
-                    "mail_msg_id": message.get("mail_msg_id"),
-                    "pop3_msg_id": message.get("pop3_msg_id"),
-                }
+            flattened_messages.append_ticket(
+                ticket_ids[i],
+                ticket_owner_names[i] if ticket_owner_names else None,
+                ticket_agentids[i] if ticket_agentids else None,
+                result
+            )
 
-                messages = message.get("messages", [])
-                if messages:
-                    for msg in messages:
-                        flattened_message = {
-                            **base_info,
-                            "message_id": msg.get("id"),
-                            "message_userid": msg.get("userid"),
-                            "message_type": msg.get("type"),
-                            "message_datecreated": msg.get("datecreated"),
-                            "message_format": msg.get("format"),
-                            "message": msg.get("message"),
-                            "message_visibility": msg.get("visibility")
-                        }
-                        flattened_messages.append(flattened_message)
-                else:
-                    flattened_messages.append(base_info)
-        
         logging.info(f"Successfully fetched messages for {len([r for r in results if not isinstance(r, Exception)])} out of {len(ticket_ids)} tickets.")
-        return flattened_messages
+        if breaker.is_open:
+            logging.error(f"Circuit for {breaker.route} is open, messages were skipped for part of this batch.")
+        return flattened_messages.to_frame()
 
     async def fetch_messages_with_sender_receiver(
         self,
@@ -193,10 +425,10 @@ class Ticket:
         max_page: int,
         per_page: int,
         session: aiohttp.ClientSession,
-        concurrent_limit: int = 10
-    ) -> ExtractionResponse:
+        sync_state: Dict[str, Dict[str, Any]] = None
+    ) -> pd.DataFrame:
         messages_with_metadata = await self.fetch_ticket_messages_batch(
-            ticket_ids, ticket_agentids, ticket_owner_names, max_page, per_page, session, concurrent_limit
+            ticket_ids, ticket_agentids, ticket_owner_names, max_page, per_page, session, sync_state
         )
 
         final_messages = await self.message_processor.process_messages_with_metadata(
@@ -207,8 +439,13 @@ class Ticket:
 
     def clear_cache(self):
         self.ticket_metadata_cache.clear()
+        self.ticket_activity_cache.clear()
+        self.message_sync_cache.clear()
+        self.incomplete_windows.clear()
+        self.skipped_tickets.clear()
         logging.info("Ticket metadata cleared!")
         self.message_processor.agent_cache.clear()
         logging.info("Agent cache cleared!")
         self.message_processor.user_cache.clear()
+        self.message_processor.ticket_owners.clear()
         logging.info("User cache cleared!")
\ No newline at end of file
@@ -1,8 +1,11 @@
-from config.constants import PROJECT_ID, DATASET_NAME, LIVEAGENT_MGO_SYSTEM_USER_ID, LIVEAGENT_MGO_SPECIAL_USER_ID
+from config.constants import PROJECT_ID, DATASET_NAME
+from core.UserDirectory import UserDirectory, user_directory
+from core.SenderReceiver import resolve_sender_receiver
 from core.LiveAgentClient import LiveAgentClient
-from typing import Dict, List, Set, Tuple, Any
-from core.BigQueryManager import BigQuery
+from typing import Dict, List, Set, Any
+from core.AsyncBigQuery import AsyncBigQuery
 from core.User import User
+import pandas as pd
 import aiohttp
 import asyncio
 import logging
@@ -13,32 +16,80 @@ logging.basicConfig(
 )
 
 class TicketMessageProcessor:
-    """Handles ticket messages and processing."""
-    def __init__(self, client: LiveAgentClient):
+    """
+    Handles ticket messages and processing.
+
+    `user_cache` and `agent_cache` hold the users and agents of the current run. They are filled from
+    the process-wide `UserDirectory` first. Directory misses go to BigQuery, then to the owner fields
+    of the tickets fetched in this run (`ticket_owners`), and only what is left to `/users/{id}`.
+    """
+    def __init__(self, client: LiveAgentClient, directory: UserDirectory = None):
         self.client = client
         self.user = User(self.client)
-        self.bigquery_client = BigQuery()
+        self.bigquery_client = AsyncBigQuery()
+        self.directory = directory or user_directory
         self.user_cache = {}
         self.agent_cache = {}
+        # owner_contactid -> {"name", "email"} from the ticket listings of this run
+        self.ticket_owners: Dict[str, Dict[str, str]] = {}
 
-    def _extract_unique_userids(self, messages_data: List[Dict]) -> Set[str]:
+    def _extract_unique_userids(self, messages_data: pd.DataFrame) -> Set[str]:
         user_ids = set()
 
-        for message in messages_data:
-            if message.get("userid"):
-                user_ids.add(message["userid"])
-
-            if message.get("message_userid"):
-                user_ids.add(message["message_userid"])
-
-            if message.get("agentid"):
-                user_ids.add(message["agentid"])
+        for column in ("userid", "message_userid", "agentid"):
+            if column in messages_data.columns:
+                user_ids.update(user_id for user_id in messages_data[column].unique() if isinstance(user_id, str) and user_id)
 
         return user_ids
 
     def get_user_cache(self) -> Dict[str, Dict[str, Any]]:
         return self.user_cache
 
+    async def load_agents(self):
+        """Agents from the directory, or from BigQuery (refreshing the directory) when it has none fresh."""
+        agents = self.directory.get_agents()
+        if agents:
+            self.agent_cache.update(agents)
+            return
+
+        await self.load_agents_from_bq()
+        if self.agent_cache:
+            self.directory.put_agents(self.agent_cache)
+
+    def add_ticket_owner(self, contact_id: str, name: str, email: str):
+        self.ticket_owners[contact_id] = {"name": name or "", "email": email or ""}
+
+    def _users_from_ticket_owners(self, user_ids: Set[str]) -> Set[str]:
+        """
+        Build the users among `user_ids` that own a ticket of this run from the ticket's owner fields,
+        saving a `/users/{id}` request each. Returns the ids still unknown.
+        """
+        found = {}
+        for user_id in user_ids:
+            owner = self.ticket_owners.get(user_id)
+            if owner:
+                found[user_id] = {
+                    "id": user_id,
+                    "name": self._resolve_user_name(owner),
+                    "email": owner["email"],
+                    "role": "",
+                    "avatar_url": ""
+                }
+        self.user_cache.update(found)
+        if found:
+            logging.info(f"Resolved {len(found)} users from ticket owner fields")
+        return user_ids - found.keys()
+
+    def _users_from_directory(self, user_ids: Set[str]) -> Set[str]:
+        """Copy the directory's users among `user_ids` into `user_cache`; returns the ids still unknown."""
+        unknown = {
+            user_id for user_id in user_ids
+            if user_id not in self.agent_cache and user_id not in self.user_cache
+        }
+        found = self.directory.get_users(unknown)
+        self.user_cache.update(found)
+        return unknown - found.keys()
+
     async def load_agents_from_bq(self):
         if not self.bigquery_client:
             logging.warning("No BigQuery client set.")
@@ -49,12 +100,11 @@ class TicketMessageProcessor:
             SELECT id, name
             FROM `{PROJECT_ID}.{DATASET_NAME}.agents`
             """
-            df = self.bigquery_client.sql_query_bq(query)
-            for _, row in df.iterrows():
-                agent_id = row["id"]
+            df = await self.bigquery_client.sql_query_bq(query)
+            for agent_id, name in zip(df["id"].tolist(), df["name"].tolist()):
                 self.agent_cache[agent_id] = {
                     "id": agent_id,
-                    "name": row["name"]
+                    "name": name
                 }
             logging.info(f"Loaded {len(self.agent_cache)} agents from BigQuery.")
         except Exception as e:
@@ -65,24 +115,28 @@ class TicketMessageProcessor:
             return
         
         try:
-            user_ids_str = "', '".join(user_ids)
+            # `id` is compared as stored (STRING), so the filter is not hidden behind a CAST
             query = f"""
-            SELECT DISTINCT CAST(id AS STRING) as id, name, email, role, avatar_url
+            SELECT DISTINCT id, name, email, role, avatar_url
             FROM `{PROJECT_ID}.{DATASET_NAME}.users`
-            WHERE CAST(id AS STRING) IN ('{user_ids_str}')
-            AND id IS NOT NULL
+            WHERE id IN UNNEST(@ids)
             """
-            df = self.bigquery_client.sql_query_bq(query)
+            df = await self.bigquery_client.query_ids(query, user_ids)
 
             if not df.empty:
-                for _, row in df.iterrows():
-                    user_id = str(row["id"])
+                for user_id, name, email, role, avatar_url in zip(
+                    df["id"].astype(str).tolist(),
+                    df["name"].tolist(),
+                    df["email"].tolist(),
+                    df["role"].tolist(),
+                    df["avatar_url"].tolist()
+                ):
                     self.user_cache[user_id] = {
                         "id": user_id,
-                        "name": row.get("name", ""),
-                        "email": row.get("email", ""),
-                        "role": row.get("role", ""),
-                        "avatar_url": row.get("avatar_url", "")
+                        "name": name,
+                        "email": email,
+                        "role": role,
+                        "avatar_url": avatar_url
                     }
                 logging.info(f"Preloaded {len(df)} users from BigQuery.")
         except Exception as e:
@@ -91,9 +145,9 @@ class TicketMessageProcessor:
     async def fetch_users_batch(
         self,
         session: aiohttp.ClientSession,
-        user_ids: List[str],
-        concurrent_limit: int = 15
+        user_ids: List[str]
     ) -> Dict[str, Dict]:
+        """Concurrency is bounded by the client's request scheduler (`users` lane)."""
         if not user_ids:
             return {}
         unique_user_ids = list(set(user_ids))
@@ -109,20 +163,17 @@ class TicketMessageProcessor:
             logging.info("All user IDs are either agents or already cached, no additional requests needed.")
             return {}
 
-        semaphore = asyncio.Semaphore(concurrent_limit)
-
         logging.info(f"Fetching user data for {len(non_agent_user_ids)} non-agent user IDs.")
         async def fetch_single_user(user_id: str):
-            async with semaphore:
-                try:
-                    user_data = await self.user.get_user(
-                        session=session,
-                        user_id=user_id
-                    )
-                    return user_id, user_data, None
-                except Exception as e:
-                    logging.warning(f"Failed to fetch user {user_id}: {e}")
-                    return user_id, None, e
+            try:
+                user_data = await self.user.get_user(
+                    session=session,
+                    user_id=user_id
+                )
+                return user_id, user_data, None
+            except Exception as e:
+                logging.warning(f"Failed to fetch user {user_id}: {e}")
+                return user_id, None, e
 
         try:
             tasks = [fetch_single_user(user_id) for user_id in non_agent_user_ids]
@@ -170,11 +221,10 @@ class TicketMessageProcessor:
         self,
         session: aiohttp.ClientSession,
         user_ids: List[str],
-        chunk_size: int = 50,
-        concurrent_limit: int = 15
+        chunk_size: int = 50
     ) -> Dict[str, Dict]:
         if len(user_ids) <= chunk_size:
-            return await self.fetch_users_batch(session, user_ids, concurrent_limit)
+            return await self.fetch_users_batch(session, user_ids)
 
         all_users = {}
         total_chunks = (len(user_ids) + chunk_size - 1) // chunk_size
@@ -184,12 +234,9 @@ class TicketMessageProcessor:
             chunk_num = (i // chunk_size) + 1
 
             logging.info(f"Processing user chunk {chunk_num}/{total_chunks} ({len(chunk)} users)")
-            chunk_result = await self.fetch_users_batch(session, chunk, concurrent_limit)
+            chunk_result = await self.fetch_users_batch(session, chunk)
             all_users.update(chunk_result)
 
-            if chunk_num < total_chunks:
-                await asyncio.sleep(0.1)
-
         logging.info(f"Completed processing {len(user_ids)} users in {total_chunks} chunks")
         return all_users
 
@@ -204,89 +251,34 @@ class TicketMessageProcessor:
 
         return "Unknown Name"
 
-    def _determine_sender_receiver(self, message_data: Dict) -> Dict[str, str]:
-        message_userid = message_data.get("userid")
-        ticket_agentid = message_data.get("agentid")
-        owner_name = message_data.get("owner_name", "Unknown User")
-
-        # MechaniGo.ph ID: 00054iwg
-        # - Sends automated messages to clients
-        # - message_format: 'T'
-
-        # System ID: system00
-        # - Sends HTML text to clients
-        # - message_format: 'H'
-
-        if message_userid == LIVEAGENT_MGO_SYSTEM_USER_ID:
-            return {
-                "sender_name": "System",
-                "sender_type": "system",
-                "receiver_name": owner_name,
-                "receiver_type": "client"
-            }
-        
-        if message_userid == LIVEAGENT_MGO_SPECIAL_USER_ID:
-            return {
-                "sender_name": "MechaniGo.ph",
-                "sender_type": "system",
-                "receiver_name": owner_name,
-                "receiver_type": "client"
-            }
-
-        if message_userid in self.agent_cache:
-            agent_name = self.agent_cache[message_userid].get("name", "Unknown Agent")
-            return {
-                "sender_name": agent_name,
-                "sender_type": "agent",
-                "receiver_name": owner_name,
-                "receiver_type": "client"
-            }
-        else:
-            agent_info = self.agent_cache.get(ticket_agentid)
-            if agent_info:
-                if agent_info["id"] == LIVEAGENT_MGO_SPECIAL_USER_ID:
-                    agent_name = "MechaniGo.ph"
-                else:
-                    agent_name = agent_info.get("name", "Unknown Agent")
-            else:
-                agent_name = "Unknown Agent"
-
-
-        return {
-            "sender_name": owner_name,
-            "sender_type": "client",
-            "receiver_name": agent_name,
-            "receiver_type": "agent"
-        }
-
     async def process_messages_with_metadata(
         self,
-        messages_data: List[Dict],
+        messages_data: pd.DataFrame,
         session: aiohttp.ClientSession
-    ) -> List[Dict]:
+    ) -> pd.DataFrame:
+        """Add sender/receiver and agent name columns to the flattened messages (in place, see `resolve_sender_receiver`)."""
         unique_user_ids = self._extract_unique_userids(messages_data)
         logging.info(f"Found {len(unique_user_ids)} unique user IDs")
 
+        await asyncio.to_thread(self.directory.load_snapshot)
         if not self.agent_cache:
-            await self.load_agents_from_bq()
-
-        await self.preload_users_from_bq(unique_user_ids)
-
-        await self.fetch_user_in_chunks(session, list(unique_user_ids), chunk_size=50, concurrent_limit=15)
-
-        processed_messages = []
-
-        for msg in messages_data:
-            sender_receiver_info = self._determine_sender_receiver(msg)
-
-            agent_info = self.agent_cache.get(msg.get("agentid"))
-            agent_name = agent_info["name"] if agent_info else "Unknown Agent"
-
-            enhanced_msg = {
-                **msg,
-                **sender_receiver_info,
-                "agent_name": agent_name
-            }
-            processed_messages.append(enhanced_msg)
-
-        return processed_messages
\ No newline at end of file
+            await self.load_agents()
+
+        missing_user_ids = self._users_from_directory(unique_user_ids)
+        logging.info(f"{len(unique_user_ids) - len(missing_user_ids)} user IDs served from the user directory")
+        if missing_user_ids:
+            await self.preload_users_from_bq(missing_user_ids)
+            unknown_user_ids = self._users_from_ticket_owners(
+                {user_id for user_id in missing_user_ids if user_id not in self.user_cache}
+            )
+            await self.fetch_user_in_chunks(session, list(unknown_user_ids), chunk_size=50)
+            self.directory.put_users({
+                user_id: self.user_cache[user_id] for user_id in missing_user_ids if user_id in self.user_cache
+            })
+        await asyncio.to_thread(self.directory.save)
+
+        resolved = resolve_sender_receiver(messages_data, self.agent_cache)
+        for column in resolved.columns:
+            messages_data[column] = resolved[column]
+
+        return messages_data
\ No newline at end of file
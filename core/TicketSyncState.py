@@ -0,0 +1,81 @@
+from core.extract.helpers.extractor_bq_helpers import upsert_to_bq_with_staging
+from config.constants import PROJECT_ID, DATASET_NAME, TICKET_SYNC_STATE_TABLE
+from google.cloud.bigquery import SchemaField
+from core.BigQueryManager import BigQuery
+from config.config import MNL_TZ
+from typing import Dict, List, Iterable, Any
+import pandas as pd
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class TicketSyncState:
+    """
+    Per-ticket record of what the last successful message sync saw: the ticket's `last_activity`
+    and `last_activity_public`, how many message groups it had and the highest `sort_order`.
+
+    Tickets whose activity timestamps are unchanged are skipped; the others resume from the page
+    that holds their last known message group.
+    """
+    SCHEMA = [
+        SchemaField("ticket_id", "STRING", mode="REQUIRED"),
+        SchemaField("last_activity", "STRING", mode="NULLABLE"),
+        SchemaField("last_activity_public", "STRING", mode="NULLABLE"),
+        SchemaField("message_count", "INTEGER", mode="NULLABLE"),
+        SchemaField("last_sort_order", "INTEGER", mode="NULLABLE"),
+        SchemaField("updated_at", "DATETIME", mode="NULLABLE"),
+    ]
+
+    def __init__(self, bigquery: BigQuery, table_name: str = TICKET_SYNC_STATE_TABLE):
+        self.bigquery = bigquery
+        self.table_name = table_name
+
+    def load(self, ticket_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the stored state of `ticket_ids`, keyed by ticket id.
+        On any error an empty dict is returned, so every ticket is fetched in full.
+        """
+        ticket_ids = [ticket_id for ticket_id in set(ticket_ids) if ticket_id]
+        if not ticket_ids:
+            return {}
+
+        try:
+            query = f"""
+            SELECT ticket_id, last_activity, last_activity_public, message_count, last_sort_order
+            FROM `{PROJECT_ID}.{DATASET_NAME}.{self.table_name}`
+            WHERE ticket_id IN UNNEST(@ids)
+            """
+            df = self.bigquery.query_ids(query, ticket_ids)
+            states = {
+                row["ticket_id"]: row
+                for row in df.to_dict(orient="records")
+            }
+            logging.info(f"Loaded sync state for {len(states)} of {len(ticket_ids)} tickets.")
+            return states
+        except Exception as e:
+            logging.warning(f"Could not load ticket sync state, fetching all messages: {e}")
+            return {}
+
+    def save(self, states: List[Dict[str, Any]]):
+        if not states:
+            return
+
+        df = pd.DataFrame(states, columns=[field.name for field in self.SCHEMA if field.name != "updated_at"])
+        df["message_count"] = df["message_count"].astype("Int64")
+        df["last_sort_order"] = df["last_sort_order"].astype("Int64")
+        df["updated_at"] = pd.Timestamp.now(tz="UTC").astimezone(MNL_TZ).tz_localize(None)
+
+        self.bigquery.ensure_dataset()
+        self.bigquery.ensure_table(self.table_name, self.SCHEMA)
+        upsert_to_bq_with_staging(self.bigquery, df, self.SCHEMA, self.table_name)
+        logging.info(f"Saved sync state for {len(df)} tickets.")
+
+    @staticmethod
+    def is_unchanged(state: Dict[str, Any], activity: Dict[str, Any]) -> bool:
+        return (
+            state.get("last_activity") == activity.get("last_activity")
+            and state.get("last_activity_public") == activity.get("last_activity_public")
+        )
@@ -1,4 +1,5 @@
 from core.LiveAgentClient import LiveAgentClient
+from config.constants import USERS_LANE
 import aiohttp
 import logging
 
@@ -16,5 +17,6 @@ class User:
     async def get_user(self, user_id: str, session: aiohttp.ClientSession):
         return await self.client.make_request(
             session=session,
-            endpoint=f"{self.endpoint}/{user_id}"
+            endpoint=f"{self.endpoint}/{user_id}",
+            lane=USERS_LANE
         )
\ No newline at end of file
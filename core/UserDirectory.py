@@ -0,0 +1,209 @@
+from config.constants import USER_DIRECTORY_MAX_USERS, USER_DIRECTORY_USER_TTL_SECONDS, USER_DIRECTORY_AGENT_TTL_SECONDS
+from config.config import USER_DIRECTORY_PATH
+from typing import Dict, Iterable, Optional, Tuple, Any
+from collections import OrderedDict
+import threading
+import sqlite3
+import logging
+import json
+import time
+import os
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+USER = "user"
+AGENT = "agent"
+
+class UserDirectory:
+    """
+    Long-lived directory of LiveAgent users and agents, shared by every request in the process.
+
+    Users are kept in memory in LRU order (at most `max_users`) and each expires `user_ttl` seconds
+    after it was fetched. Agents are small and are always refreshed together, so the whole agent list
+    expires `agent_ttl` seconds after it was loaded.
+
+    Entries are mirrored to a local SQLite snapshot, so a restarted instance starts warm. `load_snapshot`
+    reads it once per process, and `save` writes the entries changed since the last save. BigQuery
+    (`users`, `agents`) is still the source for anything missing or expired. `TicketMessageProcessor`
+    falls back to it, and to the API, and feeds the results back here.
+    """
+    def __init__(
+        self,
+        path: str = USER_DIRECTORY_PATH,
+        max_users: int = USER_DIRECTORY_MAX_USERS,
+        user_ttl: float = USER_DIRECTORY_USER_TTL_SECONDS,
+        agent_ttl: float = USER_DIRECTORY_AGENT_TTL_SECONDS
+    ):
+        self.path = path
+        self.max_users = max_users
+        self.user_ttl = user_ttl
+        self.agent_ttl = agent_ttl
+
+        # id -> (record, expires_at); most recently used last
+        self.users: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.agents: Dict[str, Dict[str, Any]] = {}
+        self.agents_expire_at = 0.0
+
+        # (kind, id) -> (record, expires_at) not yet written to the snapshot
+        self.dirty: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}
+        self.agents_dirty = False
+        self.snapshot_loaded = False
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.agent_hits = 0
+        self.agent_misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS directory ("
+            "kind TEXT, id TEXT, record TEXT, expires_at REAL, PRIMARY KEY (kind, id))"
+        )
+        return conn
+
+    def load_snapshot(self):
+        """Fill memory from the snapshot (once per process). A missing or unreadable snapshot starts empty."""
+        if self.snapshot_loaded:
+            return
+        with self.lock:
+            if self.snapshot_loaded:
+                return
+            self.snapshot_loaded = True
+            try:
+                conn = self._connect()
+                try:
+                    now = time.time()
+                    users = conn.execute(
+                        "SELECT id, record, expires_at FROM directory WHERE kind = ? AND expires_at > ? "
+                        "ORDER BY expires_at DESC, rowid DESC LIMIT ?",
+                        (USER, now, self.max_users)
+                    ).fetchall()
+                    agents = conn.execute(
+                        "SELECT id, record, expires_at FROM directory WHERE kind = ? AND expires_at > ?",
+                        (AGENT, now)
+                    ).fetchall()
+                finally:
+                    conn.close()
+            except Exception as e:
+                logging.warning(f"Could not read user directory snapshot {self.path}: {e}")
+                return
+
+            # Oldest first, so the LRU order matches the fetch order
+            for user_id, record, expires_at in reversed(users):
+                self.users.setdefault(user_id, (json.loads(record), expires_at))
+            if agents and not self.agents:
+                self.agents = {agent_id: json.loads(record) for agent_id, record, _ in agents}
+                self.agents_expire_at = min(expires_at for _, _, expires_at in agents)
+            logging.info(f"Loaded {len(users)} users and {len(agents)} agents from the user directory snapshot.")
+
+    def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.users.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        record, expires_at = entry
+        if expires_at <= time.time():
+            del self.users[user_id]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.users.move_to_end(user_id)
+        self.hits += 1
+        return record
+
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """The fresh records among `user_ids`; the others count as misses."""
+        found = {}
+        for user_id in user_ids:
+            record = self.get_user(user_id)
+            if record is not None:
+                found[user_id] = record
+        return found
+
+    def put_users(self, records: Dict[str, Dict[str, Any]]):
+        expires_at = time.time() + self.user_ttl
+        with self.lock:
+            for user_id, record in records.items():
+                self.users[user_id] = (record, expires_at)
+                self.users.move_to_end(user_id)
+                self.dirty[(USER, user_id)] = (record, expires_at)
+
+            while len(self.users) > self.max_users:
+                evicted_id, _ = self.users.popitem(last=False)
+                self.dirty.pop((USER, evicted_id), None)
+                self.evictions += 1
+
+    def get_agents(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Every agent, or `None` if the list was never loaded or has expired."""
+        if not self.agents or self.agents_expire_at <= time.time():
+            self.agent_misses += 1
+            return None
+        self.agent_hits += 1
+        return self.agents
+
+    def put_agents(self, records: Dict[str, Dict[str, Any]]):
+        with self.lock:
+            self.agents = dict(records)
+            self.agents_expire_at = time.time() + self.agent_ttl
+            self.agents_dirty = True
+
+    def save(self):
+        """Write the entries changed since the last save to the snapshot and drop expired rows from it."""
+        with self.lock:
+            dirty, self.dirty = self.dirty, {}
+            agents = dict(self.agents) if self.agents_dirty else None
+            agents_expire_at = self.agents_expire_at
+            self.agents_dirty = False
+
+        if not dirty and agents is None:
+            return
+
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO directory (kind, id, record, expires_at) VALUES (?, ?, ?, ?)",
+                        [(kind, key, json.dumps(record, default=str), expires_at) for (kind, key), (record, expires_at) in dirty.items()]
+                    )
+                    if agents is not None:
+                        conn.execute("DELETE FROM directory WHERE kind = ?", (AGENT,))
+                        conn.executemany(
+                            "INSERT INTO directory (kind, id, record, expires_at) VALUES (?, ?, ?, ?)",
+                            [(AGENT, agent_id, json.dumps(record, default=str), agents_expire_at) for agent_id, record in agents.items()]
+                        )
+                    conn.execute("DELETE FROM directory WHERE expires_at <= ?", (time.time(),))
+            finally:
+                conn.close()
+        except Exception as e:
+            # Not fatal: the entries are still in memory and will be fetched again after a restart
+            logging.warning(f"Could not write user directory snapshot {self.path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self.users),
+            "max_users": self.max_users,
+            "agents": len(self.agents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "agent_hits": self.agent_hits,
+            "agent_misses": self.agent_misses,
+            "unsaved": len(self.dirty)
+        }
+
+# Shared across requests, like the rate limiter and circuit breakers
+user_directory = UserDirectory()
@@ -0,0 +1,110 @@
+from config.constants import PROJECT_ID, DATASET_NAME, WATERMARK_TABLE, WATERMARK_LOCAL_PATH
+from google.cloud.bigquery import SchemaField
+from core.BigQueryManager import BigQuery
+from typing import Dict, Optional
+import pandas as pd
+import logging
+import json
+import os
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class WatermarkStore:
+    """
+    Persists incremental-sync cursors (e.g. the highest `date_changed` ingested for tickets).
+
+    BigQuery is the source of truth; a local JSON file mirrors every write and is used when
+    BigQuery cannot be read (local runs, transient errors). Watermarks only ever move forward.
+    """
+    SCHEMA = [
+        SchemaField("key", "STRING", mode="REQUIRED"),
+        SchemaField("watermark", "DATETIME", mode="NULLABLE"),
+        SchemaField("updated_at", "DATETIME", mode="NULLABLE"),
+    ]
+
+    def __init__(
+        self,
+        bigquery: BigQuery,
+        table_name: str = WATERMARK_TABLE,
+        local_path: str = WATERMARK_LOCAL_PATH
+    ):
+        self.bigquery = bigquery
+        self.table_name = table_name
+        self.local_path = local_path
+
+    def _read_local(self) -> Dict[str, str]:
+        try:
+            with open(self.local_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Could not read local watermarks from {self.local_path}: {e}")
+            return {}
+
+    def _write_local(self, key: str, value: pd.Timestamp):
+        try:
+            watermarks = self._read_local()
+            watermarks[key] = value.isoformat()
+            os.makedirs(os.path.dirname(self.local_path) or ".", exist_ok=True)
+            with open(self.local_path, "w") as f:
+                json.dump(watermarks, f, indent=2)
+        except Exception as e:
+            logging.warning(f"Could not write local watermark {key}: {e}")
+
+    def get(self, key: str) -> Optional[pd.Timestamp]:
+        """Return the stored watermark for `key` (timezone-naive, Asia/Manila), or `None` if there is none yet."""
+        try:
+            query = f"""
+            SELECT MAX(watermark) AS watermark
+            FROM `{PROJECT_ID}.{DATASET_NAME}.{self.table_name}`
+            WHERE key = '{key}'
+            """
+            df = self.bigquery.sql_query_bq(query)
+            if not df.empty and pd.notnull(df["watermark"].iloc[0]):
+                return pd.Timestamp(df["watermark"].iloc[0])
+        except Exception as e:
+            logging.warning(f"Could not read watermark {key} from BigQuery, using local fallback: {e}")
+
+        value = self._read_local().get(key)
+        return pd.Timestamp(value) if value else None
+
+    def advance(self, key: str, value: pd.Timestamp):
+        """Move the watermark for `key` forward to `value`. Older values are ignored."""
+        if value is None or pd.isnull(value):
+            return
+
+        value = pd.Timestamp(value)
+        if value.tzinfo is not None:
+            value = value.tz_localize(None)
+
+        current = self._read_local().get(key)
+        if not current or pd.Timestamp(current) < value:
+            self._write_local(key, value)
+
+        value_str = value.strftime("%Y-%m-%d %H:%M:%S.%f")
+        merge_query = f"""
+        MERGE `{PROJECT_ID}.{DATASET_NAME}.{self.table_name}` AS target
+        USING (
+            SELECT '{key}' AS key,
+                DATETIME '{value_str}' AS watermark,
+                CURRENT_DATETIME('Asia/Manila') AS updated_at
+        ) AS source
+        ON target.key = source.key
+        WHEN MATCHED AND (target.watermark IS NULL OR source.watermark > target.watermark) THEN
+            UPDATE SET watermark = source.watermark, updated_at = source.updated_at
+        WHEN NOT MATCHED THEN
+            INSERT (key, watermark, updated_at)
+            VALUES (source.key, source.watermark, source.updated_at)
+        """
+        try:
+            self.bigquery.ensure_dataset()
+            self.bigquery.ensure_table(self.table_name, self.SCHEMA)
+            self.bigquery.sql_query_bq(merge_query, return_data=False)
+            logging.info(f"Advanced watermark {key} to {value}")
+        except Exception as e:
+            # An older watermark in BigQuery only means the next run re-fetches an overlap, which the MERGE absorbs
+            logging.error(f"Could not persist watermark {key} to BigQuery (kept locally): {e}")
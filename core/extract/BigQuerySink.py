@@ -0,0 +1,116 @@
+from core.extract.helpers.extractor_bq_helpers import prepare_and_load_to_bq
+from config.constants import SINK_CHUNK_MAX_ROWS, SINK_CHUNK_MAX_BYTES
+from google.cloud.bigquery import SchemaField
+from core.AsyncBigQuery import AsyncBigQuery
+from typing import Dict, List, Optional, Any
+import pandas as pd
+import asyncio
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+class BigQuerySink:
+    """
+    Appends DataFrames to a BigQuery table in chunks while the caller keeps producing them.
+
+    Frames are buffered until `max_rows` rows or `max_bytes` bytes (pandas deep memory usage) are
+    held, then concatenated and loaded (`WRITE_APPEND`) through `AsyncBigQuery`, which polls the load
+    job from the event loop instead of blocking a thread on it. At most one chunk is loading at a time:
+    the next flush waits for it, so memory stays around two chunks however large the extraction window is.
+
+    The schema is generated from the first chunk (creating the table if needed) and reused for every
+    later chunk, so a chunk where a column happens to be all null is not typed differently.
+    A failed load is raised from the next `add` or from `close`.
+    """
+    def __init__(
+        self,
+        bigquery: AsyncBigQuery,
+        table_name: str,
+        max_rows: int = SINK_CHUNK_MAX_ROWS,
+        max_bytes: int = SINK_CHUNK_MAX_BYTES
+    ):
+        self.bigquery = bigquery
+        self.table_name = table_name
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+        self.buffer: List[pd.DataFrame] = []
+        self.buffered_rows = 0
+        self.buffered_bytes = 0
+        self.schema: Optional[List[SchemaField]] = None
+        self.load_task: Optional[asyncio.Task] = None
+        self.flush_lock = asyncio.Lock()
+
+        self.rows_loaded = 0
+        self.chunks_loaded = 0
+        self.peak_buffered_bytes = 0
+
+    def _is_full(self) -> bool:
+        return self.buffered_rows >= self.max_rows or self.buffered_bytes >= self.max_bytes
+
+    async def _load(self, chunk: pd.DataFrame):
+        if self.schema is None:
+            self.schema = await self.bigquery.run(
+                prepare_and_load_to_bq, self.bigquery.sync, chunk, self.table_name, load_data=False
+            )
+        await self.bigquery.load_dataframe(chunk, self.table_name, schema=self.schema)
+        self.rows_loaded += len(chunk)
+        self.chunks_loaded += 1
+        logging.info(
+            f"Loaded chunk {self.chunks_loaded} ({len(chunk)} rows) to {self.table_name}, "
+            f"{self.rows_loaded} rows so far"
+        )
+
+    async def add(self, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        self.buffer.append(df)
+        self.buffered_rows += len(df)
+        self.buffered_bytes += int(df.memory_usage(index=False, deep=True).sum())
+        self.peak_buffered_bytes = max(self.peak_buffered_bytes, self.buffered_bytes)
+        if self._is_full():
+            await self._flush(force=False)
+
+    async def _flush(self, force: bool):
+        async with self.flush_lock:
+            if self.load_task is not None:
+                load_task, self.load_task = self.load_task, None
+                await load_task
+            # Another caller may have flushed this buffer while we waited for the lock
+            if not self.buffer or not (force or self._is_full()):
+                return
+
+            chunk = pd.concat(self.buffer, ignore_index=True)
+            self.buffer = []
+            self.buffered_rows = 0
+            self.buffered_bytes = 0
+            self.load_task = asyncio.create_task(self._load(chunk))
+
+    async def close(self):
+        """Load whatever is still buffered and wait for every chunk to be stored."""
+        await self._flush(force=True)
+        async with self.flush_lock:
+            if self.load_task is not None:
+                load_task, self.load_task = self.load_task, None
+                await load_task
+
+    def abort(self):
+        """Drop the buffer and stop waiting on the chunk being loaded (its rows may still land)."""
+        self.buffer = []
+        self.buffered_rows = 0
+        self.buffered_bytes = 0
+        if self.load_task is not None:
+            self.load_task.cancel()
+            self.load_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table_name,
+            "rows_loaded": self.rows_loaded,
+            "chunks_loaded": self.chunks_loaded,
+            "rows_buffered": self.buffered_rows,
+            "peak_buffered_mib": round(self.peak_buffered_bytes / 2**20, 1)
+        }
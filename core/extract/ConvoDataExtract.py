@@ -1,7 +1,8 @@
 from core.schemas.ConvoResponse import ResponseSchema
 from config.constants import PROJECT_ID, DATASET_NAME
 from config.constants import CHATGPT_PROMPT
-from core.BigQueryManager import BigQuery
+from core.AsyncBigQuery import AsyncBigQuery
+from google.cloud import bigquery
 from config.config import OPENAI_API_KEY, GEMINI_API_KEY
 from core.LLMGateway import LLMGateway
 from datetime import datetime
@@ -26,7 +27,7 @@ class ConvoDataExtract:
     ):
         self.llm_gateway = None
         self.temperature = temperature
-        self.bq_client = BigQuery()
+        self.bq_client = AsyncBigQuery()
         self.ticket_id = ticket_id
         self.prompt = None
         self.data = None
@@ -56,7 +57,7 @@ class ConvoDataExtract:
         
         if ticket_id:
             today = datetime.today().strftime("%Y-%m-%d")
-            self.conversation_text = self.get_convo_str(ticket_id)
+            self.conversation_text = await self.get_convo_str(ticket_id)
             logging.info(
                 f"Conversation text length: "
                 f"{len(self.conversation_text) if self.conversation_text else 0}"
@@ -186,18 +187,21 @@ class ConvoDataExtract:
             logging.error(f"Exception occurred while analyzing convo: {e}")
             return output
 
-    def get_convo_str(self, ticket_id: str) -> str:
+    async def get_convo_str(self, ticket_id: str) -> str:
         """Get messages from BigQuery messages table and convert them to type string."""
         query = """
         SELECT sender_type, message
         FROM `{}.{}.messages`
-        WHERE ticket_id = '{}' 
+        WHERE ticket_id = @ticket_id
             AND message_type = 'M' AND message_format = 'T'
         ORDER BY datecreated
-        """.format(PROJECT_ID, DATASET_NAME, ticket_id)
-        df_messages = self.bq_client.sql_query_bq(query)
+        """.format(PROJECT_ID, DATASET_NAME)
+        df_messages = await self.bq_client.sql_query_bq(
+            query,
+            params=[bigquery.ScalarQueryParameter("ticket_id", "STRING", ticket_id)]
+        )
         s = [
-            f"sender: {m['sender_type']}\nmessage: {m['message']}"
-            for _, m in df_messages.iterrows()
+            f"sender: {sender_type}\nmessage: {message}"
+            for sender_type, message in zip(df_messages["sender_type"], df_messages["message"])
         ]
         return "\n\n".join(s)
\ No newline at end of file
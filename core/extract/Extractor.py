@@ -1,19 +1,35 @@
 from core.extract.helpers.extraction_helpers import process_tickets, process_ticket_messages, process_agents, process_tags, recent_tickets, process_chat, process_address
 from core.extract.helpers.extractor_bq_helpers import prepare_and_load_to_bq, upsert_to_bq_with_staging
 from api.schemas.response import ExtractionResponse, ResponseStatus
-from config.constants import PROJECT_ID, DATASET_NAME
+from config.constants import (
+    PROJECT_ID,
+    DATASET_NAME,
+    TICKETS_WATERMARK_KEY,
+    TICKETS_WATERMARK_OVERLAP_SECONDS,
+    MESSAGE_TICKET_BATCH_SIZE,
+    PIPELINE_MAX_PAGE_TASKS
+)
 from core.schemas.TicketFilter import FilterField
 from core.LiveAgentClient import LiveAgentClient
 from utils.geocode_utils import tag_viable
+from core.TicketSyncState import TicketSyncState
+from core.MessageIndex import MessageIndex
+from core.MessageColumns import TicketMetadata
+from core.extract.BigQuerySink import BigQuerySink
+from core.WatermarkStore import WatermarkStore
 from core.BigQueryManager import BigQuery
-from utils.tickets_util import set_filter
+from core.AsyncBigQuery import AsyncBigQuery
+from config.config import MNL_TZ
+from utils.tickets_util import set_filter, resolve_window
 from utils.df_utils import drop_cols
 from core.Geocode import Geocoder
 from core.Ticket import Ticket
 from core.Agent import Agent
 from core.Tag import Tag
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Any
 import pandas as pd
 import aiohttp
+import asyncio
 import logging
 
 logging.basicConfig(
@@ -50,15 +66,34 @@ class Extractor:
         self.agent = Agent(self.client)
         self.tag = Tag(self.client)
         self.bigquery = BigQuery()
-        self.geocoder = Geocoder(self.bigquery)
+        self.bigquery_async = AsyncBigQuery(self.bigquery)
+        # Built on first use: loading the municipality table is a blocking query
+        self.geocoder: Geocoder = None
+        self.watermarks = WatermarkStore(self.bigquery)
+        self.ticket_sync = TicketSyncState(self.bigquery)
+        self.message_index = MessageIndex(self.bigquery)
         self.session = session 
 
-    async def extract_tickets(
-        self,
-        date: pd.Timestamp,
-        filter_field: FilterField = FilterField.DATE_CHANGED
-    ) -> ExtractionResponse:
-        filters = set_filter(date, filter_field)
+    def _ticket_window(self, date: pd.Timestamp, filter_field: FilterField) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        For `DATE_CHANGED`, the window is `(watermark - overlap, now]` once a watermark exists;
+        `date` is only used for the very first incremental run.
+
+        The listing is offset-paginated on `date_changed`, so a ticket that changes mid-run moves to the end
+        and shifts the rest back, skipping one; the filter is also strict on the watermark's second. Re-reading
+        `TICKETS_WATERMARK_OVERLAP_SECONDS` before the watermark picks those up again, and the repeats are
+        absorbed by `drop_duplicates` and the tickets `MERGE`.
+        """
+        if filter_field == FilterField.DATE_CHANGED:
+            watermark = self.watermarks.get(TICKETS_WATERMARK_KEY)
+            if watermark is not None:
+                logging.info(f"Resuming from watermark {watermark}")
+                start = watermark.tz_localize(MNL_TZ) - pd.Timedelta(seconds=TICKETS_WATERMARK_OVERLAP_SECONDS)
+                return start, pd.Timestamp.now(tz="UTC").astimezone(MNL_TZ).floor("s")
+        return resolve_window(date, filter_field)
+
+    def _ticket_payload(self, start: pd.Timestamp, end: pd.Timestamp, filter_field: FilterField) -> Dict[str, Any]:
+        filters = set_filter(start, filter_field, end)
         ticket_payload = {
             "_perPage": self.per_page,
             "_filters": filters
@@ -66,9 +101,93 @@ class Extractor:
 
         if filter_field == FilterField.DATE_CREATED:
             ticket_payload["_sortDir"] = "ASC"
+        else:
+            # Oldest changes first, so a run cut short by `max_page` still covers a contiguous prefix of the window
+            ticket_payload["_sortField"] = filter_field.value
+            ticket_payload["_sortDir"] = "ASC"
+        return ticket_payload
+
+    async def _plan_ticket_windows(
+        self,
+        session: aiohttp.ClientSession,
+        date: pd.Timestamp,
+        filter_field: FilterField
+    ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """The run's window split so no window is truncated by `max_page * per_page`, in chronological order."""
+        start, end = await self.bigquery_async.run(self._ticket_window, date, filter_field)
+        windows = await self.ticket.plan_windows(
+            session,
+            start,
+            end,
+            filter_field,
+            self._ticket_payload(start, end, filter_field),
+            self.max_page,
+            self.per_page
+        )
+        if len(windows) > 1:
+            logging.info(f"Planned {len(windows)} windows for ({start}, {end}]")
+        return windows
+
+    def _ticket_watermark(
+        self,
+        tickets_processed: pd.DataFrame,
+        windows: List[Tuple[pd.Timestamp, pd.Timestamp]]
+    ) -> Optional[pd.Timestamp]:
+        """
+        Highest `date_changed` that is safe to resume from: tickets up to the end of the leading run of
+        windows fetched in full. `None` when a tickets page failed or the first window is incomplete.
+        """
+        # A failed tickets page leaves a gap, and the watermark must not move past tickets that were never fetched
+        if self.ticket.endpoint in self.client.truncated_endpoints:
+            logging.warning("Tickets fetch was incomplete, not advancing the watermark.")
+            return None
+
+        complete_until = None
+        for window_start, window_end in windows:
+            if (window_start, window_end) in self.ticket.incomplete_windows:
+                logging.warning(f"Window ({window_start}, {window_end}] may be missing tickets, holding the watermark before it.")
+                break
+            complete_until = window_end
+        if complete_until is None:
+            return None
+
+        # `date_changed` is naive Manila time after `process_tickets`
+        if complete_until.tzinfo is not None:
+            complete_until = complete_until.tz_convert(MNL_TZ).tz_localize(None)
+        date_changed = tickets_processed["date_changed"]
+        return date_changed[date_changed <= complete_until].max()
+
+    def _load_tickets(
+        self,
+        tickets_processed: pd.DataFrame,
+        filter_field: FilterField,
+        windows: List[Tuple[pd.Timestamp, pd.Timestamp]]
+    ):
+        logging.info("Generating schema and loading data to BigQuery...")
+        schema = prepare_and_load_to_bq(self.bigquery, tickets_processed, "tickets", load_data=False)
+        upsert_to_bq_with_staging(self.bigquery, tickets_processed, schema, "tickets")
+        logging.info("Done loading to BigQuery!")
+
+        if filter_field == FilterField.DATE_CHANGED:
+            self.watermarks.advance(TICKETS_WATERMARK_KEY, self._ticket_watermark(tickets_processed, windows))
+
+    async def extract_tickets(
+        self,
+        date: pd.Timestamp,
+        filter_field: FilterField = FilterField.DATE_CHANGED
+    ) -> ExtractionResponse:
         try:
-            logging.info(f"Extracting using the following filter: {ticket_payload["_filters"]}")
-            tickets_raw = await self.ticket.fetch_tickets(self.session, ticket_payload, self.max_page, self.per_page)
+            windows = await self._plan_ticket_windows(self.session, date, filter_field)
+            ticket_payloads = [self._ticket_payload(start, end, filter_field) for start, end in windows]
+            for ticket_payload in ticket_payloads:
+                logging.info(f"Extracting using the following filter: {ticket_payload["_filters"]}")
+            ticket_frames = await asyncio.gather(*[
+                self.ticket.fetch_tickets(self.session, ticket_payload, self.max_page, self.per_page)
+                for ticket_payload in ticket_payloads
+            ])
+            tickets_raw = pd.concat(ticket_frames, ignore_index=True)
+            if "id" in tickets_raw.columns:
+                tickets_raw = tickets_raw.drop_duplicates(subset="id", keep="last", ignore_index=True)
             tickets_processed = process_tickets(tickets_raw)
             if tickets_processed.empty:
                 return ExtractionResponse(
@@ -77,10 +196,7 @@ class Extractor:
                     data=[],
                     message="No tickets fetched!"
                 )
-            logging.info("Generating schema and loading data to BigQuery...")
-            schema = prepare_and_load_to_bq(self.bigquery, tickets_processed, "tickets", load_data=False)
-            upsert_to_bq_with_staging(self.bigquery, tickets_processed, schema, "tickets")
-            logging.info("Done loading to BigQuery!")
+            await self.bigquery_async.run(self._load_tickets, tickets_processed, filter_field, windows)
             tickets = (
                 tickets_processed
                 .where(pd.notnull(tickets_processed), None)
@@ -103,11 +219,11 @@ class Extractor:
         self,
         date: pd.Timestamp,
         session: aiohttp.ClientSession,
-        filter_field: FilterField = FilterField.DATE_CHANGED,
-        concurrent_limit: int = 10
+        filter_field: FilterField = FilterField.DATE_CHANGED
     ):
         tickets = await self.extract_tickets(date, filter_field)
-        tickets_batch = recent_tickets(
+        tickets_batch = await self.bigquery_async.run(
+            recent_tickets,
             bq_client=self.bigquery,
             project_id=PROJECT_ID,
             dataset_name=DATASET_NAME,
@@ -131,57 +247,228 @@ class Extractor:
                 data=[]
             )
 
-        messages = await self.ticket.fetch_messages_with_sender_receiver(
-            ticket_ids=ticket_ids,
-            ticket_agentids=ticket_agentids,
-            ticket_owner_names=ticket_ownernames,
-            max_page=self.max_page,
-            per_page=self.per_page,
-            session=session,
-            concurrent_limit=concurrent_limit
+        sync_state, _ = await asyncio.gather(
+            self.bigquery_async.run(self.ticket_sync.load, ticket_ids),
+            self.bigquery_async.run(self.message_index.load, ticket_ids)
         )
+        message_sink = self._message_sink()
+        try:
+            # One batch of tickets at a time, so only a batch of raw messages is held before it reaches the sink
+            for start in range(0, len(ticket_ids), MESSAGE_TICKET_BATCH_SIZE):
+                batch = slice(start, start + MESSAGE_TICKET_BATCH_SIZE)
+                messages = await self.ticket.fetch_ticket_messages_batch(
+                    ticket_ids=ticket_ids[batch],
+                    ticket_agentids=ticket_agentids[batch],
+                    ticket_owner_names=ticket_ownernames[batch],
+                    max_page=self.max_page,
+                    per_page=self.per_page,
+                    session=session,
+                    sync_state=sync_state
+                )
+                await message_sink.add(await self._process_messages(messages, session))
+            await message_sink.close()
+        except BaseException:
+            message_sink.abort()
+            raise
 
-        messages_processed = process_ticket_messages(messages)
-        if messages_processed.empty:
-            return ExtractionResponse(
-                status=ResponseStatus.ERROR,
-                count="0",
-                data=[],
-                message="No ticket messages fetched!"
-            )
+        return await self._messages_response(tickets, len(tickets.data), message_sink)
 
-        logging.info("Extracting user cache...")
-        user_data = self.ticket.get_user_cache()
-        user_list = list(user_data.values())
-        users_df = pd.DataFrame(user_list)
+    def _message_sink(self) -> BigQuerySink:
+        return BigQuerySink(self.bigquery_async, "messages")
 
-        logging.info(f"users_df: {users_df}")
+    async def _process_messages(self, messages: pd.DataFrame, session: aiohttp.ClientSession) -> pd.DataFrame:
+        """
+        Drop messages already stored (or already kept this run), then resolve senders/receivers and prepare
+        the rest for loading. `message_index` must already hold the run's tickets.
+        """
+        if messages.empty:
+            return messages
+        # Before enrichment, so no user lookups are spent on rows that are then dropped
+        messages = self.message_index.new_messages(messages)
+        if messages.empty:
+            return messages
+        messages = await self.ticket.message_processor.process_messages_with_metadata(
+            messages_data=messages, session=session
+        )
+        return process_ticket_messages(messages)
 
-        logging.info("Generating schema and loading data to BigQuery...")
-        logging.info("Loading messages...")
-        prepare_and_load_to_bq(self.bigquery, messages_processed, "messages", load_data=True)
-        logging.info("Loading users...")
-        schema = prepare_and_load_to_bq(self.bigquery, users_df, "users", load_data=False)
-        upsert_to_bq_with_staging(self.bigquery, users_df, schema, "users")
-        logging.info("Done loading to BigQuery!")
-        self.clear_all_caches()
+    async def _messages_response(self, tickets: Any, tickets_count: int, message_sink: BigQuerySink) -> ExtractionResponse:
+        """
+        Finish a messages extraction whose rows were already streamed to BigQuery: load the users seen
+        along the way and save the ticket sync state. The response carries the load stats, not the messages.
+
+        Runs even when nothing new was loaded: a refetch whose messages were all duplicates still has to
+        record the tickets' sync state, or they are fetched in full again next run.
+
+        A run that skipped tickets behind an open circuit is reported as `CIRCUIT_OPEN`, so the caller
+        can retry it; the skipped tickets have no sync state saved and are fetched again next run.
+        Only routes this run called count: the breaker registry is shared across runs.
+        """
+        tickets_skipped = len(self.ticket.skipped_tickets)
+        open_routes = self.client.breakers.open_routes(self.client.routes_tried)
+        await self.bigquery_async.run(self._load_users_and_sync_state)
+
+        if tickets_skipped or open_routes:
+            status = ResponseStatus.CIRCUIT_OPEN
+            message = f"Circuit open for {open_routes or 'a route'}, messages skipped for {tickets_skipped} tickets."
+            logging.error(message)
+        else:
+            status = ResponseStatus.SUCCESS
+            message = None if message_sink.rows_loaded else "No new ticket messages."
 
         return ExtractionResponse(
-            status=ResponseStatus.SUCCESS,
-            count=str(len(tickets.data) + len(messages)),
+            status=status,
+            count=str(tickets_count + message_sink.rows_loaded),
             data={
                 "tickets": tickets,
-                "messages": messages
-            }
+                "messages": {
+                    **message_sink.stats(),
+                    "duplicates_dropped": self.message_index.rows_dropped,
+                    "tickets_skipped": tickets_skipped
+                }
+            },
+            message=message
         )
 
+    async def _stream_ticket_windows(
+        self,
+        session: aiohttp.ClientSession,
+        windows: List[Tuple[pd.Timestamp, pd.Timestamp]],
+        filter_field: FilterField
+    ) -> AsyncIterator[pd.DataFrame]:
+        for start, end in windows:
+            ticket_payload = self._ticket_payload(start, end, filter_field)
+            logging.info(f"Extracting (pipelined) using the following filter: {ticket_payload['_filters']}")
+            async for tickets_page in self.ticket.stream_tickets(session, ticket_payload, self.max_page, self.per_page):
+                yield tickets_page
+
+    async def extract_tickets_and_messages_pipelined(
+        self,
+        date: pd.Timestamp,
+        session: aiohttp.ClientSession,
+        filter_field: FilterField = FilterField.DATE_CHANGED
+    ) -> ExtractionResponse:
+        """
+        Pipelined version of `extract_tickets_and_messages`.
+
+        Message fetching for each page of tickets starts as soon as that page arrives, using the
+        in-memory `ticket_metadata_cache` instead of reading the ticket ids back from BigQuery.
+        The tickets `MERGE` runs on the BigQuery thread pool while the remaining messages are still being fetched.
+
+        Unlike the staged version, messages are fetched for every ticket in the window
+        (not only the tickets created in the last 6 hours).
+
+        Stored message keys are loaded once, when the ticket listing is done and every ticket id of the
+        run is known. Each page's messages are fetched straight away, then deduplicated against that index,
+        processed and handed to a `BigQuerySink`.
+
+        At most `PIPELINE_MAX_PAGE_TASKS` pages are being fetched or processed at once, so raw messages,
+        sync-state queries and message requests stay bounded however many ticket pages the listing returns;
+        the other pages wait holding only their ticket metadata.
+        """
+        ticket_pages = []
+        message_tasks = []
+        metadata_cache = self.ticket.get_ticket_metadata_cache()
+        message_sink = self._message_sink()
+        index_loaded = asyncio.Event()
+        page_slots = asyncio.Semaphore(PIPELINE_MAX_PAGE_TASKS)
+
+        async def fetch_page_messages(page_metadata: List[TicketMetadata]):
+            async with page_slots:
+                await process_page_messages(page_metadata)
+
+        async def process_page_messages(page_metadata: List[TicketMetadata]):
+            ticket_ids = [metadata.ticket_id for metadata in page_metadata]
+            sync_state = await self.bigquery_async.run(self.ticket_sync.load, ticket_ids)
+            messages_with_metadata = await self.ticket.fetch_ticket_messages_batch(
+                ticket_ids=ticket_ids,
+                ticket_agentids=[metadata.agentid for metadata in page_metadata],
+                ticket_owner_names=[metadata.owner_name for metadata in page_metadata],
+                max_page=self.max_page,
+                per_page=self.per_page,
+                session=session,
+                sync_state=sync_state
+            )
+            if messages_with_metadata.empty:
+                return
+            await index_loaded.wait()
+            await message_sink.add(await self._process_messages(messages_with_metadata, session))
+
+        try:
+            windows = await self._plan_ticket_windows(session, date, filter_field)
+            async for tickets_page in self._stream_ticket_windows(session, windows, filter_field):
+                if tickets_page.empty:
+                    continue
+                ticket_pages.append(tickets_page)
+
+                page_metadata = [metadata_cache[ticket_id] for ticket_id in tickets_page["id"] if ticket_id in metadata_cache]
+                logging.info(f"Fetching messages for {len(page_metadata)} tickets from the latest page")
+                message_tasks.append(asyncio.create_task(fetch_page_messages(page_metadata)))
+
+            try:
+                await self.bigquery_async.run(self.message_index.load, list(metadata_cache))
+            finally:
+                index_loaded.set()
+
+            if not ticket_pages:
+                return ExtractionResponse(
+                    status=ResponseStatus.ERROR,
+                    count="0",
+                    data=[],
+                    message="No tickets fetched!"
+                )
+
+            tickets_raw = pd.concat(ticket_pages, ignore_index=True).drop_duplicates(subset="id", keep="last", ignore_index=True)
+            tickets_processed = process_tickets(tickets_raw)
+            logging.info(f"Found {len(tickets_processed)} tickets")
+
+            await asyncio.gather(
+                self.bigquery_async.run(self._load_tickets, tickets_processed, filter_field, windows),
+                asyncio.gather(*message_tasks)
+            )
+            await message_sink.close()
+        except BaseException:
+            for task in message_tasks:
+                task.cancel()
+            message_sink.abort()
+            raise
+
+        tickets = tickets_processed.where(pd.notnull(tickets_processed), None).to_dict(orient="records")
+        tickets_response = ExtractionResponse(
+            status=ResponseStatus.SUCCESS,
+            count=str(len(tickets)),
+            data=tickets
+        )
+        return await self._messages_response(tickets_response, len(tickets), message_sink)
+
+    def _load_users_and_sync_state(self):
+        logging.info("Extracting user cache...")
+        user_data = self.ticket.get_user_cache()
+        if user_data:
+            users_df = pd.DataFrame(list(user_data.values()))
+
+            logging.info(f"users_df: {users_df}")
+
+            logging.info("Generating schema and loading data to BigQuery...")
+            logging.info("Loading users...")
+            schema = prepare_and_load_to_bq(self.bigquery, users_df, "users", load_data=False)
+            upsert_to_bq_with_staging(self.bigquery, users_df, schema, "users")
+            logging.info("Done loading to BigQuery!")
+
+        # Only after the messages are stored, so a failed load is re-fetched next run
+        try:
+            self.ticket_sync.save(self.ticket.sync_state_updates())
+        except Exception as e:
+            logging.error(f"Could not save ticket sync state: {e}")
+        self.clear_all_caches()
+
     async def fetch_bq_table(self, table_name: str, limit: int = 10) -> ExtractionResponse:
         # Set limit to 10 for now
         try:
             query = """
             SELECT * FROM `{}.{}.{}` LIMIT {}
             """.format(PROJECT_ID, DATASET_NAME, table_name, limit)
-            df = self.bigquery.sql_query_bq(query)
+            df = await self.bigquery_async.sql_query_bq(query)
             df = df.to_dict(orient="records")
             return ExtractionResponse(
                 status=ResponseStatus.SUCCESS,
@@ -209,7 +496,7 @@ class Extractor:
                     message="No agents found!"
                 )
             logging.info("Generating schema and loading data to BigQuery...")
-            prepare_and_load_to_bq(self.bigquery, agents_processed, "agents", write_mode="WRITE_TRUNCATE")
+            await self.bigquery_async.run(prepare_and_load_to_bq, self.bigquery, agents_processed, "agents", write_mode="WRITE_TRUNCATE")
             logging.info("Done loading to BigQuery!")
             return ExtractionResponse(
                 status=ResponseStatus.SUCCESS,
@@ -236,7 +523,7 @@ class Extractor:
                     message="No tags found!"
                 )
             logging.info("Generating schema and loading data to BigQuery...")
-            prepare_and_load_to_bq(self.bigquery, tags_processed, "tags", write_mode="WRITE_TRUNCATE")
+            await self.bigquery_async.run(prepare_and_load_to_bq, self.bigquery, tags_processed, "tags", write_mode="WRITE_TRUNCATE")
             logging.info("Done loading to BigQuery!")
             return ExtractionResponse(
                 status=ResponseStatus.SUCCESS,
@@ -253,7 +540,8 @@ class Extractor:
 
     async def extract_conversation_analysis(self) -> ExtractionResponse:
         try:
-            chats = recent_tickets(
+            chats = await self.bigquery_async.run(
+                recent_tickets,
                 bq_client=self.bigquery,
                 project_id=PROJECT_ID,
                 dataset_name=DATASET_NAME,
@@ -287,6 +575,8 @@ class Extractor:
             logging.info(f"Processed chat data shape: {ticket_messages_df.shape}")
             logging.info(f"Processed chat data columns: {ticket_messages_df.columns.tolist()}")
             
+            if self.geocoder is None:
+                self.geocoder = await self.bigquery_async.run(Geocoder, self.bigquery)
             geolocation = process_address(ticket_messages_df, self.geocoder)
             ticket_messages_df = pd.concat([ticket_messages_df, geolocation], axis=1)
             ticket_messages_df = tag_viable(ticket_messages_df)
@@ -309,8 +599,10 @@ class Extractor:
             logging.info(f"Final DataFrame shape before BigQuery: {ticket_messages_df.shape}")
             logging.info("Generating schema and loading data to BigQuery...")
             
-            schema = prepare_and_load_to_bq(self.bigquery, ticket_messages_df, "convo_analysis", load_data=False)
-            upsert_to_bq_with_staging(self.bigquery, ticket_messages_df, schema, "convo_analysis")
+            schema = await self.bigquery_async.run(
+                prepare_and_load_to_bq, self.bigquery, ticket_messages_df, "convo_analysis", load_data=False
+            )
+            await self.bigquery_async.run(upsert_to_bq_with_staging, self.bigquery, ticket_messages_df, schema, "convo_analysis")
             
             logging.info("Done loading to BigQuery!")
             return ticket_messages_df.fillna(value=0).to_dict(orient="records")
@@ -329,4 +621,5 @@ class Extractor:
     def clear_all_caches(self):
         logging.info("Clearing caches...")
         self.ticket.clear_cache()
+        self.message_index.clear()
         logging.info("All caches cleared!")
\ No newline at end of file
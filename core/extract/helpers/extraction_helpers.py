@@ -50,7 +50,8 @@ def process_tickets(tickets: ExtractionResponse) -> pd.DataFrame:
     return df
 
 def process_ticket_messages(messages: pd.DataFrame) -> pd.DataFrame:
-    df = pd.DataFrame(messages)
+    # Shallow copy: the columns added below must not leak into the caller's frame
+    df = messages.copy(deep=False) if isinstance(messages, pd.DataFrame) else pd.DataFrame(messages)
     try:
         df = add_extraction_timestamp(df)
         df = set_timezone(
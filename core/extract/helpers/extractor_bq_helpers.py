@@ -106,6 +106,12 @@ def upsert_to_bq_with_staging(
             import traceback
             traceback.print_exc()
             raise
+    elif table_name == "ticket_sync_state":
+        update_columns = [
+            'last_activity', 'last_activity_public', 'message_count', 'last_sort_order', 'updated_at'
+        ]
+        all_columns = ['ticket_id'] + update_columns
+        identifier = "ticket_id"
     else:
         all_columns = ['id'] + update_columns
         identifier = "id"
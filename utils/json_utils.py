@@ -0,0 +1,43 @@
+from typing import Any, Callable, Union
+import json
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+JsonLoads = Callable[[Union[bytes, str]], Any]
+
+try:
+    import orjson
+
+    JSON_ENGINE = "orjson"
+
+    def fast_loads(body: Union[bytes, str]) -> Any:
+        """Parse JSON with `orjson`, which reads UTF-8 bytes directly (no intermediate `str`)."""
+        return orjson.loads(body)
+except ImportError:
+    JSON_ENGINE = "json"
+    fast_loads = None
+
+def std_loads(body: Union[bytes, str]) -> Any:
+    """Parse JSON with the stdlib decoder."""
+    return json.loads(body)
+
+def get_json_loads(engine: str = None) -> JsonLoads:
+    """
+    Return the JSON decoder for `engine` ("orjson" or "json").
+    Defaults to the fastest one installed; falls back to the stdlib when `orjson` is missing.
+    """
+    engine = engine or JSON_ENGINE
+    if engine == "orjson":
+        if fast_loads is not None:
+            return fast_loads
+        logging.warning("orjson is not installed, falling back to the stdlib JSON decoder.")
+    elif engine != "json":
+        raise ValueError(f"Unknown JSON engine: {engine}")
+    return std_loads
+
+# Decoder used by default for API responses
+json_loads = get_json_loads()
@@ -1,15 +1,61 @@
 from core.schemas.TicketFilter import FilterField
+from typing import List, Optional, Tuple
 import pandas as pd
 import json
 
-def set_filter(date: pd.Timestamp, filter_field: FilterField = FilterField.DATE_CREATED):
+def resolve_window(
+    date: pd.Timestamp,
+    filter_field: FilterField = FilterField.DATE_CREATED
+) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Default window for `date`: its calendar month (`DATE_CREATED`) or the 6 hours from `date` floored to the hour."""
     if filter_field == FilterField.DATE_CREATED:
         start = date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         end = (start + pd.offsets.MonthEnd(1)).replace(hour=23, minute=59, second=59)
     else:
         start = date.floor('h')
         end = start + pd.Timedelta(hours=6) - pd.Timedelta(seconds=1)
+    return start, end
+
+def set_filter(
+    date: pd.Timestamp,
+    filter_field: FilterField = FilterField.DATE_CREATED,
+    end: Optional[pd.Timestamp] = None
+):
+    """
+    Build the `_filters` for `/tickets`: `(start, end]` on `filter_field`.
+
+    When `end` is given the window is exactly `(date, end]` (incremental sync from a watermark,
+    or a sub-window from `split_window`); otherwise it is `resolve_window(date, filter_field)`.
+    """
+    if end is not None:
+        start = date
+    else:
+        start, end = resolve_window(date, filter_field)
     return json.dumps([
         [filter_field.value, "D>", f"{start}"],
         [filter_field.value, "D<=", f"{end}"]
-    ])
\ No newline at end of file
+    ])
+
+def split_window(start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Split `(start, end]` into consecutive, non-overlapping sub-windows one level finer:
+    month -> weeks -> days -> hours -> quarters of the window.
+    """
+    span = end - start
+    if span > pd.Timedelta(days=7):
+        step = pd.Timedelta(days=7)
+    elif span > pd.Timedelta(days=1):
+        step = pd.Timedelta(days=1)
+    elif span > pd.Timedelta(hours=1):
+        step = pd.Timedelta(hours=1)
+    else:
+        # Whole seconds, since the API filters are second-precision
+        step = max((span / 4).ceil("s"), pd.Timedelta(seconds=1))
+
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min(window_start + step, end)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows